@@ -1,26 +1,168 @@
 
+import pickle
+import threading
+import multiprocessing
 import numpy as np
-from scipy.optimize import minimize
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from scipy.optimize import minimize, OptimizeResult
+from scipy.stats import qmc
 from qiskit import QuantumCircuit, Aer, transpile, execute
+from qiskit.circuit import ParameterVector
+
+# stop flag shared with worker processes; set by _init_worker when the pool starts
+_worker_stop_event = None
+
+def _init_worker(stop_event):
+    """Store the pool's stop flag in each worker process."""
+    global _worker_stop_event
+    _worker_stop_event = stop_event
+
+def _run_minimize(objective_function, initial_params, method, bounds, stop_event=None):
+    """Run a single minimize call; defined at module level so it can be sent to worker processes.
+
+    The run is abandoned at its next iteration once stop_event (or the worker's stop flag) is set.
+    """
+    stop_event = stop_event if stop_event is not None else _worker_stop_event
+
+    def callback(*args, **kwargs):
+        if stop_event is not None and stop_event.is_set():
+            raise StopIteration
+
+    return minimize(objective_function, initial_params, method=method, bounds=bounds, callback=callback)
+
+# scipy methods that never estimate gradients from the objective, so cached values cannot distort a step
+_DERIVATIVE_FREE_METHODS = {'nelder-mead', 'powell', 'cobyla', 'cobyqa'}
+
+def _is_picklable(obj):
+    """Whether obj can be sent to a worker process."""
+    try:
+        pickle.dumps(obj)
+    except Exception:
+        return False
+    return True
+
+class ObjectiveCache:
+    """Bounded LRU cache of objective values keyed on parameter vectors quantized to a tolerance."""
+
+    def __init__(self, objective_function, maxsize=1024, tolerance=1e-8):
+        self.objective_function = objective_function
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+
+    def _key(self, params):
+        """Quantize a parameter vector so that vectors within the tolerance share a key."""
+        return np.round(np.asarray(params, dtype=float) / self.tolerance).astype(np.int64).tobytes()
+
+    def __call__(self, params):
+        key = self._key(params)
+        if key in self._values:
+            self.hits += 1
+            self._values.move_to_end(key)
+            return self._values[key]
+        self.misses += 1
+        value = self.objective_function(params)
+        self._values[key] = value
+        if len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+        return value
+
+    def stats(self):
+        """Return hit/miss statistics for the cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._values),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drop all cached values and reset the statistics."""
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
 
 class QuantumOptimization:
-    def __init__(self, num_qubits):
+    def __init__(self, num_qubits, cache_size=None, cache_tolerance=1e-8, max_cached_objectives=16):
         self.num_qubits = num_qubits
+        self.cache_size = cache_size  # None disables objective caching
+        self.cache_tolerance = cache_tolerance
+        self.max_cached_objectives = max_cached_objectives
+        self.objective_caches = OrderedDict()  # Least recently used objectives are evicted first
         self.qc = QuantumCircuit(num_qubits)
         self.backend = Aer.get_backend('qasm_simulator')
+        self.parameters = ParameterVector('theta', 2)
+        self.variational_qc = None
+        self.multi_start_summary = None
 
-    def optimize(self, objective_function, initial_params, bounds=None, method='COBYLA'):
-        """Quantum-aware optimization method using classical optimization algorithms."""
-        result = minimize(objective_function, initial_params, method=method, bounds=bounds)
+    def optimize(self, objective_function, initial_params, bounds=None, method='COBYLA', jac=None, use_cache=True):
+        """Quantum-aware optimization method using classical optimization algorithms.
+
+        jac may be a gradient callable or 'finite-difference'; method='adam' runs the built-in Adam optimizer.
+        Objective values are only cached when no gradient is estimated from them: finite-difference probes
+        always call the uncached objective, and gradient-based scipy methods without an analytic jac
+        (None, '2-point', '3-point', 'cs') are not cached.
+        """
+        method_name = method.lower()
+        uncached_objective = objective_function
+        if jac == 'finite-difference' or (jac is None and method_name == 'adam'):
+            jac = lambda params: self.finite_difference_gradient(uncached_objective, params)
+        if use_cache and (callable(jac) or jac is True or method_name in _DERIVATIVE_FREE_METHODS):
+            objective_function = self.cached_objective(objective_function)
+        if method_name == 'adam':
+            return self.adam_optimize(objective_function, jac, initial_params, bounds=bounds)
+        result = minimize(objective_function, initial_params, method=method, bounds=bounds, jac=jac)
         return result
 
+    def cached_objective(self, objective_function):
+        """Return a memoizing wrapper for objective_function, shared across calls, when caching is enabled."""
+        if self.cache_size is None or isinstance(objective_function, ObjectiveCache):
+            return objective_function
+        if objective_function in self.objective_caches:
+            self.objective_caches.move_to_end(objective_function)
+        else:
+            self.objective_caches[objective_function] = ObjectiveCache(objective_function, maxsize=self.cache_size,
+                                                                       tolerance=self.cache_tolerance)
+            if len(self.objective_caches) > self.max_cached_objectives:
+                self.objective_caches.popitem(last=False)
+        return self.objective_caches[objective_function]
+
+    def cache_stats(self):
+        """Aggregate hit/miss statistics over all objective caches."""
+        stats = [cache.stats() for cache in self.objective_caches.values()]
+        hits = sum(entry['hits'] for entry in stats)
+        misses = sum(entry['misses'] for entry in stats)
+        return {
+            'hits': hits,
+            'misses': misses,
+            'size': sum(entry['size'] for entry in stats),
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+    def clear_cache(self):
+        """Drop all objective caches."""
+        self.objective_caches.clear()
+
+    def build_variational_circuit(self):
+        """Build and transpile the parameterized variational circuit once and cache it."""
+        if self.variational_qc is None:
+            qc = QuantumCircuit(self.num_qubits)
+            qc.rx(self.parameters[0], 0)
+            qc.ry(self.parameters[1], 1)
+            qc.cx(0, 1)
+            qc.measure_all()
+            self.variational_qc = transpile(qc, self.backend)
+        return self.variational_qc
+
     def quantum_variational_circuit(self, params):
-        """Create a variational quantum circuit for optimization."""
-        self.qc.rx(params[0], 0)
-        self.qc.ry(params[1], 1)
-        self.qc.cx(0, 1)
-        transpiled_qc = transpile(self.qc, self.backend)
-        return transpiled_qc
+        """Create a variational quantum circuit for optimization by binding params into the cached circuit."""
+        circuit = self.build_variational_circuit()
+        return circuit.assign_parameters(dict(zip(self.parameters, params)))
 
     def evaluate_quantum_circuit(self, quantum_circuit):
         """Evaluate the quantum circuit and return measurement results."""
@@ -29,8 +171,93 @@ class QuantumOptimization:
         counts = result.get_counts()
         return counts
 
-    def optimize_variational_circuit(self, objective_function, initial_params, iterations=100):
-        """Optimize a variational quantum circuit by iterating over a classical optimization method."""
+    def evaluate_parameter_batch(self, param_batch, shots=1024):
+        """Evaluate the variational circuit for a batch of parameter vectors in a single job."""
+        param_batch = np.atleast_2d(np.asarray(param_batch, dtype=float))
+        circuit = self.build_variational_circuit()
+        binds = {param: param_batch[:, i].tolist() for i, param in enumerate(self.parameters)}
+        job = self.backend.run(circuit, shots=shots, parameter_binds=[binds])
+        counts = job.result().get_counts()
+        return counts if isinstance(counts, list) else [counts]
+
+    def expectation_batch(self, param_batch, shots=1024):
+        """Estimate the Z-parity expectation value for each parameter vector in a batch."""
+        expectations = []
+        for counts in self.evaluate_parameter_batch(param_batch, shots=shots):
+            frequencies = np.fromiter(counts.values(), dtype=float)
+            parities = np.fromiter((1 - 2 * (state.count('1') % 2) for state in counts), dtype=float)
+            expectations.append(np.dot(parities, frequencies) / frequencies.sum())
+        return np.array(expectations)
+
+    def parameter_shift_gradient(self, params, shots=1024, shift=np.pi / 2):
+        """Gradient of the variational expectation via the parameter-shift rule, evaluating all shifted circuits in one batch."""
+        params = np.asarray(params, dtype=float)
+        offsets = shift * np.eye(len(params))
+        values = self.expectation_batch(np.vstack([params + offsets, params - offsets]), shots=shots)
+        return (values[:len(params)] - values[len(params):]) / (2 * np.sin(shift))
+
+    def finite_difference_gradient(self, objective_function, params, epsilon=1e-6):
+        """Central finite-difference gradient of an arbitrary objective function."""
+        params = np.asarray(params, dtype=float)
+        offsets = epsilon * np.eye(len(params))
+        return np.array([
+            (objective_function(params + offset) - objective_function(params - offset)) / (2 * epsilon)
+            for offset in offsets
+        ])
+
+    def adam_optimize(self, objective_function, jac, initial_params, bounds=None, learning_rate=0.1,
+                      beta1=0.9, beta2=0.999, epsilon=1e-8, maxiter=200, tol=1e-6):
+        """Minimize an objective with the Adam update rule using the supplied gradient."""
+        if jac is None:
+            jac = lambda params: self.finite_difference_gradient(objective_function, params)
+        params = np.asarray(initial_params, dtype=float).copy()
+        m = np.zeros_like(params)
+        v = np.zeros_like(params)
+        grad = np.zeros_like(params)
+        if bounds is not None:
+            lower = np.array([-np.inf if low is None else low for low, _ in bounds])
+            upper = np.array([np.inf if high is None else high for _, high in bounds])
+        nit = 0
+        converged = False
+        for nit in range(1, maxiter + 1):
+            grad = np.asarray(jac(params), dtype=float)
+            if np.linalg.norm(grad) < tol:
+                converged = True
+                break
+            m = beta1 * m + (1 - beta1) * grad
+            v = beta2 * v + (1 - beta2) * grad ** 2
+            m_hat = m / (1 - beta1 ** nit)
+            v_hat = v / (1 - beta2 ** nit)
+            params -= learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+            if bounds is not None:
+                params = np.clip(params, lower, upper)
+        if converged:
+            message = f'Gradient norm below tol={tol} after {nit} iterations.'
+        else:
+            message = f'Maximum number of iterations ({maxiter}) reached before the gradient norm fell below tol={tol}.'
+        return OptimizeResult(x=params, fun=objective_function(params), jac=grad, nit=nit, success=converged,
+                              message=message)
+
+    def optimize_expectation(self, initial_params, method='L-BFGS-B', shots=1024, bounds=None):
+        """Minimize the variational circuit expectation using parameter-shift gradients."""
+        objective_function = lambda params: self.expectation_batch(params, shots=shots)[0]
+        jac = lambda params: self.parameter_shift_gradient(params, shots=shots)
+        return self.optimize(objective_function, initial_params, bounds=bounds, method=method, jac=jac)
+
+    def optimize_variational_circuit(self, objective_function, initial_params, iterations=100, multi_start=False,
+                                     max_workers=None, target_value=None, method='COBYLA', bounds=None,
+                                     use_processes=True, seed=None):
+        """Optimize a variational quantum circuit by iterating over a classical optimization method.
+
+        With multi_start=True the iterations run as independent parallel restarts; see multi_start_optimize.
+        """
+        if multi_start:
+            self.multi_start_summary = self.multi_start_optimize(objective_function, initial_params, num_starts=iterations,
+                                                                 method=method, bounds=bounds, max_workers=max_workers,
+                                                                 target_value=target_value, use_processes=use_processes,
+                                                                 seed=seed)
+            return self.multi_start_summary['best_params']
+
         best_params = initial_params
         best_value = float('inf')
 
@@ -42,6 +269,76 @@ class QuantumOptimization:
 
         return best_params
 
+    def generate_start_points(self, initial_params, num_starts, bounds=None, spread=np.pi, seed=None):
+        """Generate diverse starting points with Latin hypercube sampling, keeping initial_params as the first one."""
+        initial_params = np.asarray(initial_params, dtype=float)
+        if bounds is not None:
+            lower = np.array([initial_params[i] - spread if low is None else low for i, (low, _) in enumerate(bounds)])
+            upper = np.array([initial_params[i] + spread if high is None else high for i, (_, high) in enumerate(bounds)])
+        else:
+            lower, upper = initial_params - spread, initial_params + spread
+        starts = [initial_params]
+        if num_starts > 1:
+            sampler = qmc.LatinHypercube(d=len(initial_params), seed=seed)
+            starts.extend(qmc.scale(sampler.random(num_starts - 1), lower, upper))
+        return starts
+
+    def multi_start_optimize(self, objective_function, initial_params, num_starts=8, method='COBYLA', bounds=None,
+                             max_workers=None, target_value=None, use_processes=True, spread=np.pi, seed=None):
+        """Run independent optimizations from diverse starting points in a worker pool.
+
+        Restarts run in processes when use_processes is True and the objective function is picklable, and in
+        threads otherwise (e.g. for lambdas and closures). As soon as one run reaches target_value, queued
+        restarts are cancelled and in-flight ones stop at their next iteration; only completed runs are reported.
+        Returns a summary of the best point and all runs.
+        """
+        starts = self.generate_start_points(initial_params, num_starts, bounds=bounds, spread=spread, seed=seed)
+        use_processes = use_processes and _is_picklable(objective_function)
+        if use_processes:
+            context = multiprocessing.get_context()
+            stop_event = context.Event()
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                           initializer=_init_worker, initargs=(stop_event,))
+            task_event = None
+        else:
+            stop_event = task_event = threading.Event()
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        runs = []
+        terminated_early = False
+        try:
+            futures = {
+                executor.submit(_run_minimize, objective_function, start, method, bounds, task_event): index
+                for index, start in enumerate(starts)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                runs.append({
+                    'start_index': futures[future],
+                    'initial_params': starts[futures[future]],
+                    'params': result.x,
+                    'value': float(result.fun),
+                    'success': bool(result.success),
+                    'nfev': int(result.nfev),
+                })
+                if target_value is not None and result.fun <= target_value:
+                    terminated_early = True
+                    break
+        finally:
+            stop_event.set()
+            executor.shutdown(wait=not terminated_early, cancel_futures=True)
+
+        runs.sort(key=lambda run: run['start_index'])
+        best_run = min(runs, key=lambda run: run['value'])
+        return {
+            'best_params': best_run['params'],
+            'best_value': best_run['value'],
+            'num_completed': len(runs),
+            'num_starts': len(starts),
+            'terminated_early': terminated_early,
+            'executor': 'process' if use_processes else 'thread',
+            'runs': runs,
+        }
+
     def apply_penalty_term(self, params, penalty_factor=0.01):
         """Applies a penalty term to regularize the optimization process."""
         penalty = penalty_factor * np.sum(np.abs(params))
@@ -49,7 +346,9 @@ class QuantumOptimization:
 
     def optimize_with_penalty(self, objective_function, initial_params, penalty_factor=0.01):
         """Optimize the function while applying a penalty to the parameters."""
+        objective_function = self.cached_objective(objective_function)
+
         def penalized_function(params):
             return objective_function(params) + self.apply_penalty_term(params, penalty_factor)
         
-        return self.optimize(penalized_function, initial_params)
+        return self.optimize(penalized_function, initial_params, use_cache=False)
@@ -1,75 +1,414 @@
 
+import os
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
-from qiskit import QuantumCircuit
+from qiskit import QuantumCircuit, Aer, execute
+from qiskit.quantum_info import Statevector
+from sklearn.preprocessing import MinMaxScaler
+from .utils import QuantumUtils
+
+class BatchPipeline:
+    """Iterates over batches prepared ahead of time on a worker thread pool, preserving batch order."""
+
+    def __init__(self, data, batch_size, transform=None, prefetch=4, num_workers=1):
+        self.data = data
+        self.batch_size = batch_size
+        self.transform = transform
+        self.prefetch = max(prefetch, 1)
+        self.num_workers = num_workers
+        self.batches_produced = 0
+        self.batches_consumed = 0
+        self.samples_consumed = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._start_time = None
+
+    def _load_batch(self, start):
+        """Reads one batch and applies the transform on a worker thread."""
+        batch = np.asarray(self.data[start:start + self.batch_size])
+        if self.transform is not None:
+            batch = self.transform(batch)
+        with self._lock:
+            self.batches_produced += 1
+        return batch
+
+    def __iter__(self):
+        starts = iter(range(0, len(self.data), self.batch_size))
+        executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        self._start_time = time.perf_counter()
+        try:
+            for start in starts:
+                self._pending.append(executor.submit(self._load_batch, start))
+                if len(self._pending) >= self.prefetch:
+                    break
+            while self._pending:
+                batch = self._pending.popleft().result()
+                next_start = next(starts, None)
+                if next_start is not None:
+                    self._pending.append(executor.submit(self._load_batch, next_start))
+                self.batches_consumed += 1
+                self.samples_consumed += len(batch)
+                yield batch
+        finally:
+            self._pending.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def queue_depth(self):
+        """Number of prefetched batches that are ready but not yet consumed."""
+        return sum(future.done() for future in list(self._pending))
+
+    def stats(self):
+        """Returns throughput and queue-depth counters for the pipeline."""
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        return {
+            'batches_produced': self.batches_produced,
+            'batches_consumed': self.batches_consumed,
+            'in_flight': len(self._pending),
+            'queue_depth': self.queue_depth(),
+            'batches_per_second': self.batches_consumed / elapsed if elapsed else 0.0,
+            'samples_per_second': self.samples_consumed / elapsed if elapsed else 0.0,
+        }
 
 class QuantumDataLoader:
     def __init__(self, num_qubits):
         self.num_qubits = num_qubits
+        self.scaler = None  # Fitted MinMaxScaler shared by preprocess and batch_generator
 
     def load_csv(self, file_path):
         """Loads time series data from a CSV file."""
         return pd.read_csv(file_path)
 
-    def load_from_quantum_circuit(self, quantum_circuit: QuantumCircuit):
+    def load_csv_chunked(self, file_path, chunksize=100_000, usecols=None, dtype=np.float32):
+        """Streams a CSV file as NumPy arrays of at most chunksize rows."""
+        for chunk in pd.read_csv(file_path, chunksize=chunksize, usecols=usecols):
+            yield chunk.to_numpy(dtype=dtype)
+
+    def csv_to_memmap(self, file_path, cache_path=None, chunksize=100_000, usecols=None, dtype=np.float32):
+        """Converts a CSV file chunk by chunk into a .npy cache and returns the cache path.
+
+        Chunks are first appended to a raw scratch file because the row count is unknown until the
+        whole CSV has been read; the scratch data is then copied block-wise into the final .npy file.
+        The usecols and dtype the cache was built with are recorded in a JSON file next to it.
+        """
+        cache_path = cache_path if cache_path else os.path.splitext(file_path)[0] + '.npy'
+        scratch_path = cache_path + '.part'
+        metadata_path = cache_path + '.json'
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+        num_rows, num_cols = 0, 0
+        try:
+            with open(scratch_path, 'wb') as scratch:
+                for chunk in self.load_csv_chunked(file_path, chunksize=chunksize, usecols=usecols, dtype=dtype):
+                    num_rows += chunk.shape[0]
+                    num_cols = chunk.shape[1]
+                    chunk.tofile(scratch)
+            cache = np.lib.format.open_memmap(cache_path, mode='w+', dtype=dtype, shape=(num_rows, num_cols))
+            if num_rows:
+                scratch = np.memmap(scratch_path, dtype=dtype, mode='r', shape=(num_rows, num_cols))
+                for start in range(0, num_rows, chunksize):
+                    cache[start:start + chunksize] = scratch[start:start + chunksize]
+                del scratch
+            cache.flush()
+            del cache
+        finally:
+            if os.path.exists(scratch_path):
+                os.remove(scratch_path)
+        with open(metadata_path, 'w') as metadata_file:
+            json.dump(self._memmap_metadata(usecols, dtype), metadata_file)
+        return cache_path
+
+    @staticmethod
+    def _memmap_metadata(usecols, dtype):
+        """JSON-compatible description of the options a memmap cache is built with."""
+        metadata = {'usecols': None if usecols is None else list(usecols), 'dtype': np.dtype(dtype).str}
+        return json.loads(json.dumps(metadata, default=str))
+
+    def load_csv_memmap(self, file_path, cache_path=None, chunksize=100_000, usecols=None, dtype=np.float32):
+        """Returns a read-only memory-mapped array of a CSV file, building the .npy cache if it is missing or stale.
+
+        The cache is also rebuilt when it was built with a different usecols or dtype.
+        """
+        cache_path = cache_path if cache_path else os.path.splitext(file_path)[0] + '.npy'
+        metadata_path = cache_path + '.json'
+        stale = (not os.path.exists(cache_path) or not os.path.exists(metadata_path)
+                 or os.path.getmtime(cache_path) < os.path.getmtime(file_path))
+        if not stale:
+            with open(metadata_path) as metadata_file:
+                stale = json.load(metadata_file) != self._memmap_metadata(usecols, dtype)
+        if stale:
+            self.csv_to_memmap(file_path, cache_path, chunksize=chunksize, usecols=usecols, dtype=dtype)
+        return np.load(cache_path, mmap_mode='r')
+
+    def load_from_quantum_circuit(self, quantum_circuit: QuantumCircuit, shots=1024, return_counts=False):
         """Convert quantum circuit measurements into classical data."""
-        job = execute(quantum_circuit, backend=Aer.get_backend('qasm_simulator'), shots=1024)
-        result = job.result()
-        counts = result.get_counts()
-        data = [int(state, 2) for state, _ in counts.items()]
-        return np.array(data)
-
-    def preprocess(self, data, scale=True):
-        """Preprocess the data by scaling and reshaping for quantum models."""
+        outcomes, counts = self.sample_circuits([quantum_circuit], shots=shots)[0]
+        return (outcomes, counts) if return_counts else outcomes
+
+    def sample_circuits(self, quantum_circuits, shots=1024, backend_name='qasm_simulator', method='aer', expand=False,
+                        seed=None):
+        """Samples many circuits at once and returns (outcomes, counts) integer arrays per circuit.
+
+        method='aer' runs all circuits in a single job; method='local' samples the exact output
+        distribution of each circuit, marginalized onto its measured classical bits so outcomes match aer
+        (circuits without measurements are indexed over all qubits). Circuits that local sampling cannot
+        simulate, such as ones with mid-circuit measurements, are run on aer instead.
+        With expand=True an array of shape (num_circuits, shots) holding every individual sample is returned.
+        """
+        if isinstance(quantum_circuits, QuantumCircuit):
+            quantum_circuits = [quantum_circuits]
+        if method not in ('aer', 'local'):
+            raise ValueError(f"Unknown sampling method: {method}")
+        samples = [None] * len(quantum_circuits)
+        if method == 'local':
+            rng = np.random.default_rng(seed)
+            for index, quantum_circuit in enumerate(quantum_circuits):
+                distribution = self._measured_distribution(quantum_circuit)
+                if distribution is not None:
+                    outcomes, probabilities = distribution
+                    counts = rng.multinomial(shots, probabilities / probabilities.sum())
+                    samples[index] = (outcomes[counts > 0], counts[counts > 0])
+        remaining = [index for index, sample in enumerate(samples) if sample is None]
+        if remaining:
+            job = execute([quantum_circuits[index] for index in remaining], backend=Aer.get_backend(backend_name),
+                          shots=shots, seed_simulator=seed)
+            for index, experiment in zip(remaining, job.result().results):
+                # Raw experiment counts are keyed by hex outcome, one key per distinct outcome
+                raw_counts = getattr(experiment.data, 'counts', {})
+                outcomes = np.fromiter((int(state, 16) for state in raw_counts), dtype=np.int64, count=len(raw_counts))
+                counts = np.fromiter(raw_counts.values(), dtype=np.int64, count=len(raw_counts))
+                order = np.argsort(outcomes)
+                samples[index] = (outcomes[order], counts[order])
+        if expand:
+            return np.array([np.repeat(outcomes, counts) for outcomes, counts in samples])
+        return samples
+
+    @staticmethod
+    def _measured_distribution(quantum_circuit):
+        """Exact (outcomes, probabilities) over the measured classical bits, or None if the circuit is not unitary up to
+        its final measurements."""
+        unitary_part = quantum_circuit.remove_final_measurements(inplace=False)
+        if any(instruction.operation.name in ('measure', 'reset') or getattr(instruction.operation, 'condition', None)
+               for instruction in unitary_part.data):
+            return None
+        probabilities = Statevector(unitary_part).probabilities()
+        measured = {}  # classical bit -> qubit, the last measurement into a bit wins
+        for instruction in quantum_circuit.data:
+            if instruction.operation.name == 'measure':
+                qubit = quantum_circuit.find_bit(instruction.qubits[0]).index
+                measured[quantum_circuit.find_bit(instruction.clbits[0]).index] = qubit
+        if not measured:
+            return np.arange(len(probabilities)), probabilities
+        basis_states = np.arange(len(probabilities))
+        outcomes = np.zeros(len(probabilities), dtype=np.int64)
+        for clbit, qubit in measured.items():
+            outcomes |= ((basis_states >> qubit) & 1) << clbit
+        outcomes, inverse = np.unique(outcomes, return_inverse=True)
+        return outcomes, np.bincount(inverse, weights=probabilities, minlength=len(outcomes))
+
+    def _resolve_data(self, data, usecols=None):
+        """Memory-maps data given as a path to a .npy or CSV file; arrays are returned unchanged.
+
+        usecols selects the columns read from a CSV file (e.g. to skip a timestamp column).
+        """
+        if isinstance(data, (str, os.PathLike)):
+            if str(data).endswith('.npy'):
+                return np.load(data, mmap_mode='r')
+            return self.load_csv_memmap(data, usecols=usecols)
+        return data
+
+    def preprocess(self, data, scale=True, fit=True):
+        """Preprocess the data by scaling and reshaping for quantum models.
+
+        The fitted scaler is kept on self.scaler; pass fit=False to transform new data with it.
+        """
         if scale:
-            from sklearn.preprocessing import MinMaxScaler
-            scaler = MinMaxScaler()
-            data = scaler.fit_transform(data)
+            if fit or self.scaler is None:
+                self.scaler = MinMaxScaler()
+                self.scaler.fit(data)
+            data = self.scaler.transform(data)
         return data.reshape(-1, self.num_qubits)
 
+    def partial_fit_scaler(self, chunk):
+        """Updates the running min/max of the scaler with a chunk of data."""
+        if self.scaler is None:
+            self.scaler = MinMaxScaler()
+        self.scaler.partial_fit(np.asarray(chunk))
+        return self.scaler
+
+    def fit_scaler(self, data, chunk_size=100_000):
+        """Fits the scaler in a single pass over an array, memory map or iterable of chunks."""
+        self.scaler = MinMaxScaler()
+        chunks = data
+        if hasattr(data, 'shape'):
+            chunks = (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        for chunk in chunks:
+            self.partial_fit_scaler(chunk)
+        return self.scaler
+
+    def save_scaler(self, file_path):
+        """Saves the fitted scaler's min/max and feature range to a .npz file."""
+        np.savez(file_path, data_min=self.scaler.data_min_, data_max=self.scaler.data_max_,
+                 feature_range=np.array(self.scaler.feature_range))
+
+    def load_scaler(self, file_path):
+        """Restores a scaler saved with save_scaler for transform-only reuse."""
+        with np.load(file_path) as saved:
+            self.scaler = MinMaxScaler(feature_range=tuple(saved['feature_range']))
+            self.scaler.partial_fit(np.vstack([saved['data_min'], saved['data_max']]))
+        return self.scaler
+
     def split_train_test(self, data, test_size=0.2):
         """Split the data into training and testing sets."""
         num_train = int((1 - test_size) * len(data))
         return data[:num_train], data[num_train:]
 
-    def batch_generator(self, data, batch_size):
-        """Generates batches of data for quantum models."""
+    def batch_generator(self, data, batch_size, scale=False, usecols=None):
+        """Generates batches of data for quantum models.
+
+        data may also be a path to a .npy or CSV file, which is served from a memory-mapped cache;
+        usecols selects the CSV columns to load.
+        With scale=True each batch is transformed by the scaler, which is first fitted chunk-wise if needed.
+        """
+        data = self._resolve_data(data, usecols=usecols)
+        if scale and self.scaler is None:
+            self.fit_scaler(data, chunk_size=batch_size)
         for i in range(0, len(data), batch_size):
-            yield data[i:i + batch_size]
+            batch = data[i:i + batch_size]
+            yield self.scaler.transform(batch) if scale else batch
+
+    def prefetch_batches(self, data, batch_size, prefetch=4, num_workers=1, scale=False, augment=False,
+                         augmentation_factor=2, usecols=None):
+        """Returns a BatchPipeline that prepares batches in background threads.
 
-    def load_quantum_state(self, quantum_state, shots=1024):
+        Each batch is optionally scaled with the fitted scaler and augmented with augment_data.
+        usecols selects the columns loaded when data is a CSV path.
+        """
+        data = self._resolve_data(data, usecols=usecols)
+        if scale and self.scaler is None:
+            self.fit_scaler(data, chunk_size=batch_size)
+
+        def transform(batch):
+            if scale:
+                batch = self.scaler.transform(batch)
+            if augment:
+                batch = self.augment_data(batch, augmentation_factor=augmentation_factor)
+            return batch
+
+        return BatchPipeline(data, batch_size, transform=transform, prefetch=prefetch, num_workers=num_workers)
+
+    def load_quantum_state(self, quantum_state, shots=1024, return_counts=False):
         """Load a quantum state and return measurement results as classical data."""
-        backend = Aer.get_backend('qasm_simulator')
-        job = execute(quantum_state, backend, shots=shots)
-        result = job.result()
-        counts = result.get_counts()
-        classical_data = [int(state, 2) for state in counts.keys()]
-        return np.array(classical_data)
-
-    def augment_data(self, data, augmentation_factor=2):
-        """Applies data augmentation techniques to time series data."""
-        augmented_data = []
+        outcomes, counts = self.sample_circuits([quantum_state], shots=shots)[0]
+        return (outcomes, counts) if return_counts else outcomes
+
+    def augment_data(self, data, augmentation_factor=2, methods=('jitter',), seed=None, **augmentation_options):
+        """Applies data augmentation techniques to time series data.
+
+        The augmented copies are written into one preallocated array; use augment_batches to avoid
+        materializing the enlarged dataset altogether.
+        """
+        data = np.asarray(data)
+        rng = np.random.default_rng(seed)
+        augmented_data = np.empty((augmentation_factor,) + data.shape)
+        rows = np.arange(len(data))
         for i in range(augmentation_factor):
-            noise = np.random.normal(0, 0.1, data.shape)
-            augmented_data.append(data + noise)
-        return np.vstack(augmented_data)
+            plan = self._augmentation_plan(len(data), data.shape[1:], rng, methods, **augmentation_options)
+            augmented_data[i] = self._augment_rows(data, rows, plan)
+        return augmented_data.reshape((-1,) + data.shape[1:]) if data.ndim > 1 else augmented_data
+
+    def augment_batches(self, data, batch_size, augmentation_factor=2, methods=('jitter',), seed=None,
+                        **augmentation_options):
+        """Lazily yields augmented batches with the same values as augment_data for the same seed.
+
+        Scaling factors and warp windows are drawn once per copy and jitter noise is addressed by row, so
+        batching does not change the result.
+        """
+        data = self._resolve_data(data)
+        rng = np.random.default_rng(seed)
+        for _ in range(augmentation_factor):
+            plan = self._augmentation_plan(len(data), data.shape[1:], rng, methods, **augmentation_options)
+            for i in range(0, len(data), batch_size):
+                yield self._augment_rows(data, np.arange(i, min(i + batch_size, len(data))), plan)
+
+    def augment_batch(self, batch, rng, methods=('jitter',), **augmentation_options):
+        """Applies the selected augmentations ('jitter', 'scaling', 'window_warp') to one batch."""
+        batch = np.asarray(batch)
+        plan = self._augmentation_plan(len(batch), batch.shape[1:], rng, methods, **augmentation_options)
+        return self._augment_rows(batch, np.arange(len(batch)), plan)
+
+    def _augmentation_plan(self, length, row_shape, rng, methods, noise_std=0.1, scaling_std=0.1, warp_ratio=0.1,
+                           warp_scales=(0.5, 2.0)):
+        """Draws the random parameters of every augmentation step for one copy of a series of the given length."""
+        plan = []
+        for method in methods:
+            if method == 'jitter':
+                plan.append(('jitter', (int(rng.integers(2 ** 63 - 1)), noise_std)))
+            elif method == 'scaling':
+                plan.append(('scaling', rng.normal(1, scaling_std, row_shape)))
+            elif method == 'window_warp':
+                window = max(int(np.ceil(warp_ratio * length)), 2)
+                if length > window:
+                    start = int(rng.integers(0, length - window))
+                    stretched = max(int(round(window * rng.choice(warp_scales))), 2)
+                    plan.append(('window_warp', (start, window, stretched, length)))
+            else:
+                raise ValueError(f"Unknown augmentation method: {method}")
+        return plan
+
+    def _augment_rows(self, data, rows, plan, noise_block=1024):
+        """Evaluates the augmented values of the given rows of one copy, applying the plan steps in order.
+
+        Jitter noise comes from one generator per block of noise_block rows, so any row's noise can be
+        reproduced without drawing the noise of the rows before it.
+        """
+        if not plan:
+            return np.asarray(data[rows], dtype=float)
+        (method, params), previous = plan[-1], plan[:-1]
+        if method == 'scaling':
+            return self._augment_rows(data, rows, previous, noise_block) * params
+        if method == 'jitter':
+            seed, noise_std = params
+            values = self._augment_rows(data, rows, previous, noise_block)
+            blocks = rows // noise_block
+            for block in np.unique(blocks):
+                noise = np.random.default_rng([seed, int(block)]).normal(0, noise_std, (noise_block,) + values.shape[1:])
+                selected = blocks == block
+                values[selected] += noise[rows[selected] - block * noise_block]
+            return values
+        positions = self._window_warp_positions(rows, *params)
+        lower = np.minimum(np.floor(positions).astype(int), params[3] - 2)
+        weights = (positions - lower).reshape((-1,) + (1,) * (np.ndim(data) - 1))
+        return (self._augment_rows(data, lower, previous, noise_block) * (1 - weights)
+                + self._augment_rows(data, lower + 1, previous, noise_block) * weights)
+
+    @staticmethod
+    def _window_warp_positions(rows, start, window, stretched, length):
+        """Source positions of output rows when a window is stretched or compressed and resampled to length.
+
+        The warped series is piecewise linear in the source position: identity before the window, the window
+        resampled to stretched points, then identity shifted past it. Only the requested rows are computed.
+        """
+        warped_length = length - window + stretched
+        knots = np.array([0, start, start + stretched - 1, warped_length - 1], dtype=float)
+        sources = np.array([0, start, start + window - 1, length - 1], dtype=float)
+        return np.interp(rows * (warped_length - 1) / (length - 1), knots, sources)
 
     def save_processed_data(self, data, file_path):
         """Saves preprocessed data to a CSV file."""
         pd.DataFrame(data).to_csv(file_path, index=False)
 
-    def load_from_qiskit_backend(self, backend_name, shots=1024):
+    def load_from_qiskit_backend(self, backend_name, shots=1024, return_counts=False):
         """Loads quantum data from a Qiskit backend."""
-        backend = Aer.get_backend(backend_name)
         quantum_circuit = QuantumCircuit(self.num_qubits)
-        job = execute(quantum_circuit, backend, shots=shots)
-        result = job.result()
-        counts = result.get_counts()
-        return np.array([int(state, 2) for state in counts.keys()])
-
-    def time_series_from_quantum_data(self, quantum_data, look_back=3):
-        """Generates time series data from quantum measurements."""
-        time_series_data = []
-        for i in range(len(quantum_data) - look_back):
-            time_series_data.append(quantum_data[i:i + look_back])
-        return np.array(time_series_data)
+        quantum_circuit.measure_all()
+        outcomes, counts = self.sample_circuits([quantum_circuit], shots=shots, backend_name=backend_name)[0]
+        return (outcomes, counts) if return_counts else outcomes
+
+    def time_series_from_quantum_data(self, quantum_data, look_back=3, copy=False):
+        """Generates time series data from quantum measurements as a view of look-back windows."""
+        return QuantumUtils.sliding_windows(quantum_data, look_back, num_windows=len(quantum_data) - look_back, copy=copy)
@@ -1,46 +1,305 @@
 
 import numpy as np
-from sklearn.decomposition import PCA
+from collections import OrderedDict
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.feature_selection import mutual_info_regression
+from .utils import QuantumUtils
+
+# Statistics available from the rolling temporal feature engine, in output column order
+ROLLING_FEATURES = ('mean', 'var', 'min', 'max', 'slope', 'autocorr')
+
+def _window_sums(values, window_size):
+    """Sum every run of window_size consecutive values in O(n) using a cumulative sum."""
+    cumulative = np.concatenate(([0.0], np.cumsum(values)))
+    return cumulative[window_size:] - cumulative[:-window_size]
+
+def _rolling_extreme(values, window_size, ufunc):
+    """Rolling min or max in O(n) from blockwise prefix and suffix extrema (van Herk/Gil-Werman).
+
+    Equivalent to a monotone deque scan, but with all work done by vectorized accumulate calls.
+    """
+    num_windows = len(values) - window_size + 1
+    padded_length = -(-len(values) // window_size) * window_size
+    padded = np.empty(padded_length)
+    padded[:len(values)] = values
+    padded[len(values):] = values[-1]  # Padding repeats a real value so it never changes an extreme
+    blocks = padded.reshape(-1, window_size)
+    prefix = ufunc.accumulate(blocks, axis=1).reshape(-1)
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].reshape(-1)
+    # A window starting at i spans the tail of its block (suffix) and the head of the next one (prefix)
+    return np.where(np.arange(num_windows) % window_size == 0, suffix[:num_windows],
+                    ufunc(suffix[:num_windows], prefix[window_size - 1:window_size - 1 + num_windows]))
+
+def _stratified_indices(y, sample_size, rng, num_bins=10):
+    """Draws a sorted subsample whose strata of y (classes, or quantile bins of a continuous y) keep their proportions."""
+    values, strata = np.unique(y, return_inverse=True)
+    if len(values) > 2 * num_bins:
+        edges = np.quantile(y, np.linspace(0, 1, num_bins + 1)[1:-1])
+        strata = np.searchsorted(edges, y, side='right')
+    strata = strata.reshape(-1)
+    indices = []
+    for stratum in np.unique(strata):
+        members = np.flatnonzero(strata == stratum)
+        count = max(int(round(sample_size * len(members) / len(y))), 1)
+        indices.append(rng.choice(members, size=min(count, len(members)), replace=False))
+    return np.sort(np.concatenate(indices))
 
 class QuantumFeatureExtraction:
-    def __init__(self, num_qubits):
+    def __init__(self, num_qubits, mi_cache_size=32):
         self.num_qubits = num_qubits
+        self.pca = None  # Fitted PCA or IncrementalPCA shared by the principal component methods
+        self.mi_cache_size = mi_cache_size
+        self._mi_cache = OrderedDict()  # LRU of mutual information scores keyed on data fingerprints and options
+
+    def extract_principal_components(self, data, n_components=2, fit=True, svd_solver='auto', random_state=None):
+        """Extracts the principal components using PCA for dimensionality reduction.
+
+        The fitted PCA is kept on self.pca; pass fit=False to project new data with it. The default solver
+        switches to randomized SVD for large inputs; svd_solver='randomized' forces it.
+        """
+        if fit or self.pca is None:
+            self.pca = PCA(n_components=n_components, svd_solver=svd_solver, random_state=random_state)
+            return self.pca.fit_transform(data)
+        return self.transform_principal_components(data)
+
+    def partial_fit_pca(self, batch, n_components=2, refit=False):
+        """Updates an incremental PCA with a batch of rows.
+
+        A PCA fitted in one pass cannot be updated, so replacing it with a new incremental PCA requires refit=True.
+        """
+        if self.pca is not None and not isinstance(self.pca, IncrementalPCA) and not refit:
+            raise ValueError("The fitted PCA is not incremental; pass refit=True to replace it with an IncrementalPCA")
+        if refit or not isinstance(self.pca, IncrementalPCA):
+            self.pca = IncrementalPCA(n_components=n_components)
+        self.pca.partial_fit(np.asarray(batch))
+        return self.pca
+
+    def fit_pca(self, data, n_components=2, batch_size=100_000):
+        """Fits an incremental PCA in a single pass over an array, memory map or iterable of batches."""
+        self.pca = IncrementalPCA(n_components=n_components)
+        batches = data
+        if hasattr(data, 'shape'):
+            batches = (data[i:i + batch_size] for i in range(0, len(data), batch_size))
+        pending = None
+        for batch in batches:
+            batch = np.asarray(batch)
+            if not hasattr(self.pca, 'n_samples_seen_'):
+                # The first partial_fit needs at least n_components rows, so short leading batches are merged
+                pending = batch if pending is None else np.concatenate([pending, batch])
+                if len(pending) < n_components:
+                    continue
+                batch, pending = pending, None
+            self.partial_fit_pca(batch)
+        if pending is not None:
+            raise ValueError(f"Need at least {n_components} rows to fit PCA, got {len(pending)}")
+        return self.pca
+
+    def transform_principal_components(self, data, chunk_size=100_000):
+        """Projects data with the fitted PCA without refitting, chunk by chunk for memory-mapped inputs."""
+        if self.pca is None:
+            raise ValueError("PCA has not been fitted; call extract_principal_components or fit_pca first")
+        if not isinstance(data, np.memmap):
+            return self.pca.transform(np.asarray(data))
+        projected = np.empty((len(data), self.pca.n_components_))
+        for i in range(0, len(data), chunk_size):
+            projected[i:i + chunk_size] = self.pca.transform(np.asarray(data[i:i + chunk_size]))
+        return projected
+
+    def save_pca(self, file_path):
+        """Saves the fitted PCA's projection, and incremental statistics if any, to a .npz file."""
+        state = {'components': self.pca.components_, 'mean': self.pca.mean_,
+                 'explained_variance': self.pca.explained_variance_,
+                 'explained_variance_ratio': self.pca.explained_variance_ratio_,
+                 'singular_values': self.pca.singular_values_, 'noise_variance': self.pca.noise_variance_}
+        if isinstance(self.pca, IncrementalPCA):
+            state.update(var=self.pca.var_, n_samples_seen=self.pca.n_samples_seen_)
+        np.savez(file_path, **state)
 
-    def extract_principal_components(self, data, n_components=2):
-        """Extracts the principal components using PCA for dimensionality reduction."""
-        pca = PCA(n_components=n_components)
-        return pca.fit_transform(data)
+    def load_pca(self, file_path):
+        """Restores a PCA saved with save_pca for transform-only reuse, or further partial_fit calls."""
+        with np.load(file_path) as saved:
+            components = saved['components']
+            incremental = 'n_samples_seen' in saved
+            pca = IncrementalPCA(n_components=len(components)) if incremental else PCA(n_components=len(components))
+            pca.components_ = components
+            pca.n_components_ = len(components)
+            pca.n_features_in_ = components.shape[1]
+            pca.mean_ = saved['mean']
+            pca.explained_variance_ = saved['explained_variance']
+            pca.explained_variance_ratio_ = saved['explained_variance_ratio']
+            pca.singular_values_ = saved['singular_values']
+            pca.noise_variance_ = float(saved['noise_variance'])
+            if incremental:
+                pca.var_ = saved['var']
+                pca.n_samples_seen_ = saved['n_samples_seen']
+        self.pca = pca
+        return self.pca
 
-    def quantum_mutual_information(self, X, y):
-        """Calculates mutual information between features and target using quantum-based methods."""
-        return mutual_info_regression(X, y)
+    def quantum_mutual_information(self, X, y, n_jobs=1, sample_size=None, n_repeats=1, random_state=None,
+                                   return_std=False, use_cache=True):
+        """Calculates mutual information between features and target using quantum-based methods.
 
-    def apply_quantum_entanglement(self, data):
-        """Transforms features using quantum entanglement operations."""
-        entangled_features = []
-        for i in range(len(data)):
-            entangled_row = [self._entangle(x) for x in data[i]]
-            entangled_features.append(entangled_row)
-        return np.array(entangled_features)
+        With n_jobs > 1 the columns are scored in worker processes; the estimator's noise is drawn once before
+        the columns are distributed, so the scores do not depend on n_jobs. sample_size scores a stratified
+        subsample of the rows instead of all of them, and n_repeats > 1 repeats the scoring on independent
+        subsamples and averages it; return_std then also returns the standard error of each score. With
+        use_cache, the last mi_cache_size results are kept per fingerprint of X and y and scoring options.
+        """
+        X = np.asarray(X)
+        y = np.asarray(y)
+        if not use_cache:
+            scores, errors = self._score_mutual_information(X, y, n_jobs, sample_size, n_repeats, random_state)
+            return (scores, errors) if return_std else scores
+        key = (QuantumUtils.array_fingerprint(X), QuantumUtils.array_fingerprint(y), sample_size, n_repeats, random_state)
+        if key in self._mi_cache:
+            self._mi_cache.move_to_end(key)
+            scores, errors = self._mi_cache[key]
+        else:
+            scores, errors = self._score_mutual_information(X, y, n_jobs, sample_size, n_repeats, random_state)
+            self._mi_cache[key] = (scores, errors)
+            if len(self._mi_cache) > self.mi_cache_size:
+                self._mi_cache.popitem(last=False)
+        return (scores.copy(), errors.copy()) if return_std else scores.copy()
 
-    def _entangle(self, x):
-        """Simulates an entanglement transformation on a feature."""
-        return np.sin(x) ** 2 + np.cos(x) ** 2
+    def _score_mutual_information(self, X, y, n_jobs, sample_size, n_repeats, random_state):
+        """Scores every column over n_repeats subsamples, returning the mean scores and their standard errors."""
+        rng = np.random.default_rng(random_state)
+        scores = np.empty((n_repeats, X.shape[1]))
+        for repeat in range(n_repeats):
+            rows = _stratified_indices(y, sample_size, rng) if sample_size and sample_size < len(y) else slice(None)
+            seed = random_state if n_repeats == 1 or random_state is None else int(rng.integers(2 ** 31 - 1))
+            scores[repeat] = mutual_info_regression(X[rows], y[rows], random_state=seed, n_jobs=n_jobs)
+        errors = scores.std(axis=0, ddof=1) / np.sqrt(n_repeats) if n_repeats > 1 else np.zeros(X.shape[1])
+        return scores.mean(axis=0), errors
+
+    def apply_quantum_entanglement(self, data, out=None, dtype=None, chunk_size=None):
+        """Transforms features using quantum entanglement operations.
+
+        The transform runs as whole-array ufuncs. Pass out to write into an existing array (out=data works in
+        place), dtype=np.float32 to halve memory traffic, and chunk_size to stream a memory-mapped input
+        through bounded scratch buffers; memmaps default to chunks of 65536 rows.
+        """
+        if not isinstance(data, np.memmap):
+            data = np.asarray(data)
+        if dtype is None:
+            dtype = out.dtype if out is not None else np.result_type(data.dtype, np.float32)
+        if out is None:
+            out = np.empty(data.shape, dtype=dtype)
+        elif out.shape != data.shape:
+            raise ValueError(f"out has shape {out.shape}, expected {data.shape}")
+        if chunk_size is None:
+            chunk_size = 65536 if isinstance(data, np.memmap) else max(len(data), 1)
+
+        scratch = np.empty((min(chunk_size, len(data)),) + data.shape[1:], dtype=out.dtype)
+        for start in range(0, len(data), chunk_size):
+            stop = min(start + chunk_size, len(data))
+            self._entangle(data[start:stop], out=out[start:stop], scratch=scratch[:stop - start])
+        return out
+
+    def _entangle(self, x, out=None, scratch=None):
+        """Simulates an entanglement transformation on a feature or an array of features."""
+        if out is None:
+            return np.sin(x) ** 2 + np.cos(x) ** 2
+        if scratch is None:
+            scratch = np.empty_like(out)
+        # The cosine term goes to scratch first so that out may alias x
+        np.cos(x, out=scratch, dtype=out.dtype)
+        np.square(scratch, out=scratch)
+        np.sin(x, out=out, dtype=out.dtype)
+        np.square(out, out=out)
+        return np.add(out, scratch, out=out)
 
     def extract_temporal_quantum_features(self, time_series_data, look_back=3):
         """Extracts temporal quantum-specific features from time series data."""
-        features = []
-        for i in range(len(time_series_data) - look_back):
-            segment = time_series_data[i:i + look_back]
-            quantum_feature = np.mean(segment)  # Placeholder for more complex quantum extraction logic
-            features.append(quantum_feature)
-        return np.array(features)
-
-    def save_features(self, features, file_path):
-        """Saves extracted features to a file."""
-        np.save(file_path, features)
-
-    def load_features(self, file_path):
-        """Loads saved features from a file."""
-        return np.load(file_path)
+        data = np.asarray(time_series_data, dtype=np.float64)
+        # The mean over a window of samples equals the rolling mean of the per-sample means
+        if len(data) <= look_back:
+            return np.empty(0)  # No window is followed by a next sample
+        series = data.reshape(len(data), -1).mean(axis=1)
+        # Placeholder for more complex quantum extraction logic
+        return self.extract_rolling_features(series, window_sizes=(look_back,), features=('mean',))[:-1, 0]
+
+    def extract_rolling_features(self, time_series_data, window_sizes=(3,), features=ROLLING_FEATURES, return_names=False,
+                                 block_size=4096):
+        """Computes rolling statistics for several window sizes at once as a single feature matrix.
+
+        Row t describes the windows ending at sample t + max(window_sizes) - 1, and columns are ordered by
+        window size, then by feature. Mean, variance (ddof=0), least-squares slope and lag-1 autocorrelation
+        come from cumulative sums, min and max from blockwise extrema, so every feature costs O(n) regardless
+        of the window size. The cumulative sums restart every block_size windows on locally centred values,
+        which bounds their rounding error by the block length rather than the series length.
+        """
+        series = np.asarray(time_series_data, dtype=np.float64)
+        if series.ndim != 1:
+            raise ValueError(f"Expected a univariate series, got shape {series.shape}")
+        unknown = set(features) - set(ROLLING_FEATURES)
+        if unknown:
+            raise ValueError(f"Unknown rolling features: {sorted(unknown)}")
+        max_window = max(window_sizes)
+        num_rows = len(series) - max_window + 1
+        if num_rows < 1:
+            raise ValueError(f"Series of length {len(series)} is shorter than the largest window {max_window}")
+
+        matrix = np.empty((num_rows, len(window_sizes) * len(features)))
+        names = []
+        column = 0
+        for window_size in window_sizes:
+            stats = self._rolling_statistics(series, window_size, features, block_size)
+            for feature in features:
+                matrix[:, column] = stats[feature][max_window - window_size:]
+                names.append(f"{feature}_{window_size}")
+                column += 1
+        return (matrix, names) if return_names else matrix
+
+    def _rolling_statistics(self, series, window_size, features, block_size=4096):
+        """Computes the requested rolling statistics for every window of one size, block by block."""
+        num_windows = len(series) - window_size + 1
+        moments = [feature for feature in features if feature not in ('min', 'max')]
+        stats = {feature: np.empty(num_windows) for feature in moments}
+        for first in range(0, num_windows, block_size):
+            last = min(first + block_size, num_windows)
+            # The windows starting in [first, last) only see these samples
+            block = self._window_moments(series[first:last + window_size - 1], window_size, moments)
+            for feature in moments:
+                stats[feature][first:last] = block[feature]
+        if 'min' in features:
+            stats['min'] = _rolling_extreme(series, window_size, np.minimum)
+        if 'max' in features:
+            stats['max'] = _rolling_extreme(series, window_size, np.maximum)
+        return stats
+
+    def _window_moments(self, segment, window_size, features):
+        """Computes the moment-based statistics of every window in a segment from its local cumulative sums."""
+        w = window_size
+        # Centering on the segment mean keeps the cumulative sums small, limiting cancellation
+        offset = segment.mean()
+        centered = segment - offset
+        sums = _window_sums(centered, w)
+        means = sums / w
+        variances = np.maximum(_window_sums(centered ** 2, w) / w - means ** 2, 0.0)
+        stats = {'mean': means + offset, 'var': variances}
+        if 'slope' in features:
+            # sum_k k * x[s + k] = sum_j j * x[j] - s * sum_j x[j] over the window starting at s
+            starts = np.arange(len(sums))
+            weighted = _window_sums(np.arange(len(segment)) * centered, w) - starts * sums
+            denominator = w * (w ** 2 - 1) / 12.0
+            stats['slope'] = (weighted - sums * (w - 1) / 2.0) / denominator if w > 1 else np.zeros(len(sums))
+        if 'autocorr' in features:
+            if w > 1:
+                lagged = _window_sums(centered[:-1] * centered[1:], w - 1)[:len(sums)]
+                heads = sums - centered[w - 1:]  # Every sample but the last of each window
+                tails = sums - centered[:len(sums)]  # Every sample but the first of each window
+                covariance = lagged - means * (heads + tails) + (w - 1) * means ** 2
+                total = w * variances
+                stats['autocorr'] = np.divide(covariance, total, out=np.zeros_like(total), where=total > 1e-12)
+            else:
+                stats['autocorr'] = np.zeros(len(sums))
+        return stats
+
+    def save_features(self, features, file_path, chunk_rows=None, compress=False, append=False):
+        """Saves extracted features to a file, or to a chunked FeatureStore that new time ranges can be appended to."""
+        QuantumUtils.save_numpy_array(features, file_path, chunk_rows=chunk_rows, compress=compress, append=append)
+
+    def load_features(self, file_path, start=0, stop=None, columns=None):
+        """Loads saved features, optionally only rows [start, stop) and a subset of columns."""
+        return QuantumUtils.load_numpy_array(file_path, start=start, stop=stop, columns=columns)
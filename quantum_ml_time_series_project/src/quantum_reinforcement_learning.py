@@ -1,12 +1,353 @@
 
+import glob
+import json
+import multiprocessing
+import os
 import numpy as np
 from qiskit import QuantumCircuit, Aer, transpile, execute
 from qiskit.circuit import Parameter
 from sklearn.preprocessing import StandardScaler
-from collections import deque
+
+class ReplayMemory:
+    """Fixed-capacity ring buffer of transitions stored in preallocated NumPy arrays."""
+
+    def __init__(self, capacity, state_size):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.uint8)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.position = 0  # Slot the next transition is written to
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, state, action, reward, next_state, done):
+        """Store a transition, overwriting the oldest one when the buffer is full."""
+        self.states[self.position] = state
+        self.actions[self.position] = action
+        self.rewards[self.position] = reward
+        self.next_states[self.position] = next_state
+        self.dones[self.position] = done
+        self.position = (self.position + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions with one vectorized write, wrapping around the buffer."""
+        count = len(actions)
+        slots = (self.position + np.arange(count)) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.position = int((self.position + count) % self.capacity)
+        self.size = min(self.size + count, self.capacity)
+        return slots
+
+    def sample(self, batch_size, rng=None):
+        """Sample a batch of distinct transitions uniformly; returns their indices, arrays and unit weights."""
+        rng = rng if rng is not None else np.random.default_rng()
+        indices = rng.choice(self.size, batch_size, replace=False)
+        return indices, self.get(indices), np.ones(batch_size)
+
+    def update_priorities(self, indices, td_errors):
+        """Uniform replay ignores priorities."""
+
+    def get(self, indices):
+        """Return (states, actions, rewards, next_states, dones) arrays for the given slots."""
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
+
+class SumTree:
+    """Binary tree of priority sums over a fixed number of leaves, updated and searched in O(log n)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.num_leaves = 1 << max(int(np.ceil(np.log2(max(capacity, 1)))), 0)
+        self.tree = np.zeros(2 * self.num_leaves)  # Node i has children 2i and 2i + 1; the root is node 1
+
+    def total(self):
+        """Sum of all priorities."""
+        return self.tree[1]
+
+    def get(self, indices):
+        """Priorities stored at the given leaves."""
+        return self.tree[np.asarray(indices) + self.num_leaves]
+
+    def update(self, indices, priorities):
+        """Set leaf priorities and recompute their ancestors level by level."""
+        nodes = np.asarray(indices, dtype=np.int64) + self.num_leaves
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        """Return the leaves whose cumulative priority interval contains each value.
+
+        Values that rounding pushes past the last non-zero priority end on that leaf, never on an empty one.
+        """
+        values = np.array(values, dtype=float)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.num_leaves:
+            left = 2 * nodes
+            go_right = (values > self.tree[left]) & (self.tree[left + 1] > 0)
+            values = np.where(go_right, values - self.tree[left], values)
+            nodes = np.where(go_right, left + 1, left)
+        return np.minimum(nodes - self.num_leaves, self.capacity - 1)
+
+class PrioritizedReplayMemory(ReplayMemory):
+    """Replay memory sampling transitions proportionally to their TD error through a sum tree."""
+
+    def __init__(self, capacity, state_size, alpha=0.6, beta=0.4, beta_increment=0.001, priority_epsilon=1e-6):
+        super().__init__(capacity, state_size)
+        self.alpha = alpha  # How strongly priorities skew sampling (0 is uniform)
+        self.beta = beta  # Importance-sampling correction, annealed towards 1
+        self.beta_increment = beta_increment
+        self.priority_epsilon = priority_epsilon
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def append(self, state, action, reward, next_state, done):
+        """Store a transition with the highest priority seen so far so it is replayed at least once."""
+        self.tree.update([self.position], [self.max_priority])
+        super().append(state, action, reward, next_state, done)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions, each with the highest priority seen so far."""
+        slots = super().extend(states, actions, rewards, next_states, dones)
+        self.tree.update(slots, np.full(len(slots), self.max_priority))
+        return slots
+
+    def sample(self, batch_size, rng=None):
+        """Sample one transition from each of batch_size equal priority segments.
+
+        Returns the indices, transition arrays and importance-sampling weights normalized to a maximum of 1.
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        segment = self.tree.total() / batch_size
+        # Only the first size leaves hold transitions
+        indices = np.minimum(self.tree.find((np.arange(batch_size) + rng.random(batch_size)) * segment), self.size - 1)
+        probabilities = self.tree.get(indices) / self.tree.total()
+        weights = (self.size * probabilities) ** -self.beta
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return indices, self.get(indices), weights / weights.max()
+
+    def update_priorities(self, indices, td_errors):
+        """Set the priorities of replayed transitions from their TD errors."""
+        priorities = (np.abs(td_errors) + self.priority_epsilon) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+class SparseQTable:
+    """Q-table storing only visited states in an open-addressing hash table.
+
+    Supports the indexing patterns of a dense (num_states, action_space) array: table[s], table[states],
+    table[s, a] and assignments to them. Unvisited states read as default_value and are only inserted on write.
+    Every write flags its slot, so the states changed since clear_dirty can be listed with dirty_states.
+    """
+
+    _EMPTY = -1
+    _HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)  # Fibonacci hashing constant
+
+    def __init__(self, num_states, action_space, default_value=0.0, initial_capacity=1024, max_load=0.5):
+        self.num_states = num_states
+        self.action_space = action_space
+        self.default_value = default_value
+        self.max_load = max_load
+        self.size = 0
+        self._allocate(1 << max(int(np.ceil(np.log2(max(initial_capacity, 2)))), 1))
+
+    @property
+    def shape(self):
+        return (self.num_states, self.action_space)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self._bits = capacity.bit_length() - 1
+        self.keys = np.full(capacity, self._EMPTY, dtype=np.int64)
+        self.values = np.full((capacity, self.action_space), self.default_value, dtype=np.float64)
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+    def _hash(self, keys):
+        hashed = keys.astype(np.uint64) * self._HASH_MULTIPLIER
+        return (hashed >> np.uint64(64 - self._bits)).astype(np.int64)
+
+    def _probe(self, keys):
+        """Linear probing for all keys at once; returns each key's slot (or first empty slot) and a found mask."""
+        slots = self._hash(keys)
+        found = np.zeros(len(keys), dtype=bool)
+        pending = np.arange(len(keys))
+        while len(pending):
+            stored = self.keys[slots[pending]]
+            hit = stored == keys[pending]
+            found[pending[hit]] = True
+            pending = pending[~(hit | (stored == self._EMPTY))]
+            slots[pending] = (slots[pending] + 1) & (self.capacity - 1)
+        return slots, found
+
+    def _grow(self):
+        """Double the capacity and reinsert all stored states."""
+        occupied = self.keys != self._EMPTY
+        keys, values, dirty = self.keys[occupied], self.values[occupied], self.dirty[occupied]
+        self._allocate(self.capacity * 2)
+        self.size = 0
+        slots = self._insert(keys)
+        self.values[slots] = values
+        self.dirty[slots] = dirty
+
+    def _insert(self, keys):
+        """Return writable slots for keys, inserting missing ones in collision-free rounds."""
+        keys = np.asarray(keys, dtype=np.int64)
+        unique_keys = np.unique(keys)
+        _, found = self._probe(unique_keys)
+        missing = unique_keys[~found]
+        while (self.size + len(missing)) > self.max_load * self.capacity:
+            self._grow()
+        while len(missing):
+            slots, _ = self._probe(missing)
+            _, first = np.unique(slots, return_index=True)  # One key per contended empty slot per round
+            self.keys[slots[first]] = missing[first]
+            self.size += len(first)
+            missing = np.delete(missing, first)
+        slots, _ = self._probe(keys)
+        return slots
+
+    def _rows(self, states):
+        states = np.asarray(states, dtype=np.int64)
+        slots, found = self._probe(states.ravel())
+        rows = np.full((states.size, self.action_space), self.default_value, dtype=np.float64)
+        rows[found] = self.values[slots[found]]
+        return rows.reshape(states.shape + (self.action_space,))
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            return self._rows(key)
+        states, actions = np.broadcast_arrays(np.asarray(key[0], dtype=np.int64), np.asarray(key[1], dtype=np.int64))
+        rows = self._rows(states.ravel())
+        values = rows[np.arange(states.size), actions.ravel()].reshape(states.shape)
+        return values[()] if values.ndim == 0 else values
+
+    def __setitem__(self, key, value):
+        if not isinstance(key, tuple):
+            slots = self._insert(np.atleast_1d(np.asarray(key, dtype=np.int64)))
+            self.values[slots] = value  # Look up self.values only after _insert may have grown it
+            self.dirty[slots] = True
+            return
+        states, actions = np.broadcast_arrays(np.asarray(key[0], dtype=np.int64), np.asarray(key[1], dtype=np.int64))
+        slots = self._insert(states.ravel())
+        self.values[slots, actions.ravel()] = np.broadcast_to(value, states.shape).ravel()
+        self.dirty[slots] = True
+
+    def add_at(self, states, actions, updates):
+        """Unbuffered in-place addition, like np.add.at on a dense table."""
+        slots = self._insert(np.asarray(states, dtype=np.int64))
+        np.add.at(self.values, (slots, np.asarray(actions, dtype=np.int64)), updates)
+        self.dirty[slots] = True
+
+    def items(self):
+        """Return the stored state indices and their Q-value rows."""
+        occupied = self.keys != self._EMPTY
+        return self.keys[occupied], self.values[occupied]
+
+    def dirty_states(self):
+        """Return the sorted states written since the last clear_dirty."""
+        return np.sort(self.keys[self.dirty])
+
+    def clear_dirty(self):
+        """Reset the per-slot write flags."""
+        self.dirty[:] = False
+
+def _environment_worker(connection, environment_fn):
+    """Own one environment in a worker process and serve reset/step commands over a pipe."""
+    environment = environment_fn()
+    try:
+        while True:
+            command, action = connection.recv()
+            if command == 'reset':
+                connection.send(environment.reset())
+            elif command == 'step':
+                next_state, reward, done = environment.step(action)[:3]
+                reset_state = environment.reset() if done else next_state
+                connection.send((next_state, reward, done, reset_state))
+            elif command == 'close':
+                break
+    finally:
+        connection.close()
+
+class VectorizedEnvironmentRunner:
+    """Steps N environments in lockstep, each in its own worker process (or in-process when use_processes=False).
+
+    Environments are built from factory callables and must provide reset() -> state and
+    step(action) -> (next_state, reward, done, ...). Finished environments are reset automatically.
+    """
+
+    def __init__(self, environment_fns, use_processes=True):
+        self.num_environments = len(environment_fns)
+        self.use_processes = use_processes
+        self.states = None
+        if use_processes:
+            self.connections = []
+            self.processes = []
+            for environment_fn in environment_fns:
+                parent_connection, child_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_environment_worker, args=(child_connection, environment_fn),
+                                                  daemon=True)
+                process.start()
+                child_connection.close()
+                self.connections.append(parent_connection)
+                self.processes.append(process)
+        else:
+            self.environments = [environment_fn() for environment_fn in environment_fns]
+
+    def reset(self):
+        """Reset every environment and return the stacked initial states."""
+        if self.use_processes:
+            for connection in self.connections:
+                connection.send(('reset', None))
+            states = [connection.recv() for connection in self.connections]
+        else:
+            states = [environment.reset() for environment in self.environments]
+        self.states = np.array(states)
+        return self.states
+
+    def step(self, actions):
+        """Apply one action per environment; returns (next_states, rewards, dones) arrays.
+
+        self.states is advanced to the next states, with finished environments replaced by their reset state.
+        """
+        if self.use_processes:
+            for connection, action in zip(self.connections, actions):
+                connection.send(('step', action))
+            results = [connection.recv() for connection in self.connections]
+        else:
+            results = []
+            for environment, action in zip(self.environments, actions):
+                next_state, reward, done = environment.step(action)[:3]
+                results.append((next_state, reward, done, environment.reset() if done else next_state))
+        next_states, rewards, dones, reset_states = zip(*results)
+        self.states = np.array(reset_states)
+        return np.array(next_states), np.array(rewards, dtype=float), np.array(dones, dtype=bool)
+
+    def close(self):
+        """Stop the worker processes."""
+        if self.use_processes:
+            for connection in self.connections:
+                connection.send(('close', None))
+                connection.close()
+            for process in self.processes:
+                process.join()
+            self.connections = []
+            self.processes = []
 
 class QuantumReinforcementLearningAgent:
-    def __init__(self, num_qubits, action_space, gamma=0.99, alpha=0.01, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01):
+    def __init__(self, num_qubits, action_space, gamma=0.99, alpha=0.01, epsilon=1.0, epsilon_decay=0.995, epsilon_min=0.01,
+                 validate_encoding=False, memory_size=1000, prioritized_replay=False, priority_alpha=0.6, priority_beta=0.4,
+                 q_table_backend='dense'):
         self.num_qubits = num_qubits
         self.action_space = action_space
         self.gamma = gamma  # Discount factor
@@ -14,15 +355,46 @@ class QuantumReinforcementLearningAgent:
         self.epsilon = epsilon  # Exploration rate
         self.epsilon_decay = epsilon_decay
         self.epsilon_min = epsilon_min
-        self.q_table = np.zeros((2**num_qubits, action_space))  # Q-table for quantum states and actions
-        self.memory = deque(maxlen=1000)  # Replay memory
+        self.q_table_backend = q_table_backend
+        self.q_table = self._create_q_table()  # Q-table for quantum states and actions
+        if prioritized_replay:
+            self.memory = PrioritizedReplayMemory(memory_size, num_qubits, alpha=priority_alpha, beta=priority_beta)
+        else:
+            self.memory = ReplayMemory(memory_size, num_qubits)  # Replay memory
+        self.rng = np.random.default_rng()
+        self.validate_encoding = validate_encoding  # Cross-check the fast index path against the circuit path
+        self._bit_weights = 1 << np.arange(num_qubits - 1, -1, -1, dtype=np.int64)
+        self.step_count = 0  # Number of Q-learning updates applied
+        self._clear_dirty()
 
         self.qc = QuantumCircuit(num_qubits)
         self.simulator = Aer.get_backend('qasm_simulator')
 
+    def _create_q_table(self):
+        """Allocate an empty dense array or sparse hash table according to q_table_backend."""
+        if self.q_table_backend == 'dense':
+            return np.zeros((2**self.num_qubits, self.action_space))
+        if self.q_table_backend == 'sparse':
+            return SparseQTable(2**self.num_qubits, self.action_space)
+        raise ValueError(f"Unknown Q-table backend: {self.q_table_backend}")
+
+    def _state_index(self, states):
+        """Maps bit-vector states (shape (..., num_qubits)) to Q-table indices by vectorized bit packing."""
+        return np.asarray(states, dtype=np.int64) @ self._bit_weights
+
+    def _classical_state(self, state):
+        """Returns the Q-table index of a basis state, optionally validated against the circuit path."""
+        index = int(self._state_index(state))
+        if self.validate_encoding:
+            self._quantum_encoding(state)
+            measured_index = self._quantum_state_to_classical()
+            if measured_index != index:
+                raise RuntimeError(f"Circuit encoding measured {measured_index}, expected {index}")
+        return index
+
     def _quantum_encoding(self, state):
         """Encodes classical state into a quantum state."""
-        self.qc.reset(range(self.num_qubits))
+        self.qc = QuantumCircuit(self.num_qubits)
         for i, bit in enumerate(state):
             if bit == 1:
                 self.qc.x(i)  # Apply X-gate if state bit is 1
@@ -34,49 +406,235 @@ class QuantumReinforcementLearningAgent:
         job = execute(self.qc, self.simulator, shots=1)
         result = job.result().get_counts()
         measured_state = list(result.keys())[0]  # Get measurement result as string
-        return int(measured_state, 2)  # Convert binary string to integer
+        return int(measured_state[::-1], 2)  # Qubit i is state bit i, most significant first
 
     def act(self, state):
         """Choose an action based on epsilon-greedy policy."""
         if np.random.rand() <= self.epsilon:
             return np.random.choice(self.action_space)  # Exploration
-        quantum_state = self._quantum_encoding(state)
-        classical_state = self._quantum_state_to_classical()
+        classical_state = self._classical_state(state)
         return np.argmax(self.q_table[classical_state])  # Exploitation
 
+    def act_batch(self, states):
+        """Choose one epsilon-greedy action per row of a (num_environments, num_qubits) state matrix."""
+        classical_states = self._state_index(states)
+        greedy_actions = np.argmax(self.q_table[classical_states], axis=1)
+        random_actions = self.rng.integers(0, self.action_space, len(classical_states))
+        explore = self.rng.random(len(classical_states)) <= self.epsilon
+        return np.where(explore, random_actions, greedy_actions)
+
     def learn(self, state, action, reward, next_state, done):
         """Update Q-table based on the agent's experience."""
-        quantum_state = self._quantum_encoding(state)
-        classical_state = self._quantum_state_to_classical()
-        quantum_next_state = self._quantum_encoding(next_state)
-        classical_next_state = self._quantum_state_to_classical()
+        classical_state = self._classical_state(state)
+        classical_next_state = self._classical_state(next_state)
 
         target = reward
         if not done:
             target += self.gamma * np.max(self.q_table[classical_next_state])  # Q-learning update rule
 
         self.q_table[classical_state, action] += self.alpha * (target - self.q_table[classical_state, action])
+        self._mark_dirty(classical_state)
+        self.step_count += 1
 
         if done:
             self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
 
+    def learn_batch(self, states, actions, rewards, next_states, dones, weights=None):
+        """Apply Q-learning updates for a batch of transitions in one vectorized pass.
+
+        All TD targets are computed from the Q-table before the update and accumulated with np.add.at,
+        so repeated state-action pairs in a batch each contribute. weights scale the individual updates
+        (importance sampling for prioritized replay). Returns the TD errors.
+        """
+        classical_states = self._state_index(states)
+        classical_next_states = self._state_index(next_states)
+        actions = np.asarray(actions, dtype=np.int64)
+        dones = np.asarray(dones, dtype=bool)
+
+        next_values = np.max(self.q_table[classical_next_states], axis=1)
+        targets = np.asarray(rewards, dtype=float) + self.gamma * next_values * ~dones
+        td_errors = targets - self.q_table[classical_states, actions]
+        updates = self.alpha * td_errors if weights is None else self.alpha * weights * td_errors
+        if isinstance(self.q_table, SparseQTable):
+            self.q_table.add_at(classical_states, actions, updates)
+        else:
+            np.add.at(self.q_table, (classical_states, actions), updates)
+        self._mark_dirty(classical_states)
+        self.step_count += len(actions)
+
+        num_done = int(np.count_nonzero(dones))
+        if num_done:
+            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** num_done)
+        return td_errors
+
     def remember(self, state, action, reward, next_state, done):
         """Store experience in replay memory."""
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.append(state, action, reward, next_state, done)
+
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of experiences in replay memory."""
+        self.memory.extend(states, actions, rewards, next_states, dones)
+
+    def train_vectorized(self, runner, num_steps, replay_batch_size=None):
+        """Run num_steps lockstep steps over all environments of a VectorizedEnvironmentRunner.
+
+        Every step learns from the fresh transitions in one batch, stores them, and optionally replays a batch.
+        """
+        states = runner.reset()
+        total_reward = 0.0
+        episodes = 0
+        for _ in range(num_steps):
+            actions = self.act_batch(states)
+            next_states, rewards, dones = runner.step(actions)
+            self.learn_batch(states, actions, rewards, next_states, dones)
+            self.remember_batch(states, actions, rewards, next_states, dones)
+            if replay_batch_size:
+                self.replay(replay_batch_size)
+            total_reward += rewards.sum()
+            episodes += int(np.count_nonzero(dones))
+            states = runner.states
+        return {
+            'steps': num_steps * runner.num_environments,
+            'episodes': episodes,
+            'mean_reward': float(total_reward / (num_steps * runner.num_environments)),
+        }
 
     def replay(self, batch_size):
         """Sample a batch from memory and learn from it."""
         if len(self.memory) < batch_size:
             return
-        batch = np.random.choice(len(self.memory), batch_size, replace=False)
-        for i in batch:
-            state, action, reward, next_state, done = self.memory[i]
-            self.learn(state, action, reward, next_state, done)
+        indices, batch, weights = self.memory.sample(batch_size, self.rng)
+        td_errors = self.learn_batch(*batch, weights=weights)
+        self.memory.update_priorities(indices, td_errors)
+        return td_errors
+
+    def _mark_dirty(self, classical_states):
+        """Flag Q-table rows changed since the last checkpoint; sparse tables flag their own writes."""
+        if self._dirty_rows is not None:
+            self._dirty_rows[classical_states] = True
+
+    def _clear_dirty(self):
+        """Start a new record of changed rows: a per-row bitmap for dense tables, per-slot flags for sparse ones."""
+        if isinstance(self.q_table, SparseQTable):
+            self.q_table.clear_dirty()
+            self._dirty_rows = None
+        else:
+            self._dirty_rows = np.zeros(len(self.q_table), dtype=bool)
+
+    def dirty_states(self):
+        """Return the sorted Q-table rows changed since the last checkpoint."""
+        if self._dirty_rows is None:
+            return self.q_table.dirty_states()
+        return np.flatnonzero(self._dirty_rows)
+
+    def _checkpoint_metadata(self):
+        return {
+            'format_version': 1,
+            'num_qubits': self.num_qubits,
+            'action_space': self.action_space,
+            'q_table_backend': self.q_table_backend,
+            'gamma': self.gamma,
+            'alpha': self.alpha,
+            'epsilon': self.epsilon,
+            'epsilon_decay': self.epsilon_decay,
+            'epsilon_min': self.epsilon_min,
+            'step_count': self.step_count,
+        }
+
+    def save_checkpoint(self, directory, incremental=False):
+        """Save the Q-table and agent metadata (epsilon, hyperparameters, step count) to a checkpoint directory.
+
+        Dense tables are stored as q_table.npy; an incremental save writes only the dirty rows into that file
+        in place. Sparse tables are stored as states.npy/values.npy plus one delta file per incremental save.
+        Falls back to a full save when no compatible checkpoint exists yet.
+        """
+        os.makedirs(directory, exist_ok=True)
+        metadata_path = os.path.join(directory, 'metadata.json')
+        if incremental and os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                previous = json.load(f)
+            compatible = all(previous.get(key) == value for key, value in self._checkpoint_metadata().items()
+                             if key in ('format_version', 'num_qubits', 'action_space', 'q_table_backend'))
+        else:
+            compatible = False
+
+        dirty = self.dirty_states()
+        if compatible and isinstance(self.q_table, SparseQTable):
+            delta_index = len(glob.glob(os.path.join(directory, 'delta_*.npz')))
+            np.savez(os.path.join(directory, f'delta_{delta_index:06d}.npz'), states=dirty, values=self.q_table[dirty])
+        elif compatible:
+            stored = np.load(os.path.join(directory, 'q_table.npy'), mmap_mode='r+')
+            stored[dirty] = self.q_table[dirty]
+            stored.flush()
+            del stored
+        else:
+            for delta_path in glob.glob(os.path.join(directory, 'delta_*.npz')):
+                os.remove(delta_path)
+            if isinstance(self.q_table, SparseQTable):
+                states, values = self.q_table.items()
+                self._save_array_atomic(os.path.join(directory, 'states.npy'), states)
+                self._save_array_atomic(os.path.join(directory, 'values.npy'), values)
+            else:
+                self._save_array_atomic(os.path.join(directory, 'q_table.npy'), self.q_table)
+
+        with open(metadata_path + '.tmp', 'w') as f:
+            json.dump(self._checkpoint_metadata(), f, indent=2)
+        os.replace(metadata_path + '.tmp', metadata_path)
+        self._clear_dirty()
+
+    @staticmethod
+    def _save_array_atomic(path, array):
+        """Write an array next to path and swap it in, so a table memory-mapped from path stays readable."""
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, array)
+        os.replace(path + '.tmp', path)
+
+    def load_checkpoint(self, directory, mmap_mode='c'):
+        """Load a checkpoint written by save_checkpoint, restoring metadata.
+
+        Dense tables are memory-mapped (copy-on-write by default, so updates stay in memory until saved);
+        sparse tables are rebuilt from the base arrays followed by the deltas in order.
+        """
+        with open(os.path.join(directory, 'metadata.json')) as f:
+            metadata = json.load(f)
+        if (metadata['num_qubits'], metadata['action_space']) != (self.num_qubits, self.action_space):
+            raise ValueError(f"Checkpoint is for {metadata['num_qubits']} qubits and {metadata['action_space']} actions")
+        for key in ('gamma', 'alpha', 'epsilon', 'epsilon_decay', 'epsilon_min', 'step_count'):
+            setattr(self, key, metadata[key])
+        self.q_table_backend = metadata['q_table_backend']
+        if self.q_table_backend == 'sparse':
+            states = np.load(os.path.join(directory, 'states.npy'), mmap_mode='r')
+            self.q_table = SparseQTable(2**metadata['num_qubits'], metadata['action_space'],
+                                        initial_capacity=2 * max(len(states), 1))
+            self.q_table[states] = np.load(os.path.join(directory, 'values.npy'), mmap_mode='r')
+            for delta_path in sorted(glob.glob(os.path.join(directory, 'delta_*.npz'))):
+                with np.load(delta_path) as delta:
+                    self.q_table[delta['states']] = delta['values']
+        else:
+            self.q_table = np.load(os.path.join(directory, 'q_table.npy'), mmap_mode=mmap_mode)
+        self._clear_dirty()
+        return metadata
 
     def save_model(self, path):
         """Save the Q-table to a file."""
-        np.save(path, self.q_table)
+        if isinstance(self.q_table, SparseQTable):
+            states, values = self.q_table.items()
+            with open(path, 'wb') as f:
+                np.savez(f, states=states, values=values, shape=np.array(self.q_table.shape),
+                         default_value=self.q_table.default_value)
+        else:
+            np.save(path, self.q_table)
 
     def load_model(self, path):
         """Load the Q-table from a file."""
-        self.q_table = np.load(path)
+        saved = np.load(path)
+        if isinstance(saved, np.ndarray):
+            self.q_table = saved
+            self._dirty_rows = np.ones(len(saved), dtype=bool)  # Every row differs from the last checkpoint
+            return
+        with saved:
+            num_states, action_space = saved['shape']
+            self.q_table = SparseQTable(int(num_states), int(action_space), default_value=float(saved['default_value']),
+                                        initial_capacity=2 * len(saved['states']))
+            self.q_table[saved['states']] = saved['values']  # Flags every loaded state as changed
+        self._dirty_rows = None
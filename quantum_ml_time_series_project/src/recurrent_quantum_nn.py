@@ -1,14 +1,231 @@
 
+import math
 import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from qiskit import QuantumCircuit, Aer, transpile, execute
+from qiskit.quantum_info import Statevector
+from qiskit.algorithms.optimizers import ADAM
 from qiskit_machine_learning.circuit.library import ZZFeatureMap
 from qiskit_machine_learning.algorithms import VQC
 from qiskit_machine_learning.kernels import QuantumKernel
+from sklearn.kernel_ridge import KernelRidge
 from sklearn.metrics import mean_squared_error
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, ParameterGrid
+from .utils import QuantumUtils
+
+def _fit_and_score(config, data, split_index, num_train, kernel=None):
+    """Train a model for one configuration on the num_train samples before split_index and score it on the rest.
+
+    Defined at module level so that worker processes can run it.
+    """
+    network = RecurrentQuantumNN(**config, kernel=kernel)
+    train_data = data[max(split_index - num_train, 0):split_index]
+    validation_data = data[max(split_index - network.time_steps, 0):]  # Keep one look-back window of context
+    model = network.build_model(train_data)
+    return float(network.evaluate(model, validation_data))
+
+def _recursive_forecast(model, windows, horizon):
+    """Forecast horizon steps ahead for a batch of look-back windows, feeding each prediction back as input."""
+    windows = np.asarray(windows)
+    batch_size, time_steps = windows.shape[:2]
+    sample_shape = windows.shape[2:]
+    # Windows and forecasts share one buffer so each step reads a shifted view instead of rolling the windows
+    buffer = np.empty((batch_size, time_steps + horizon) + sample_shape, dtype=np.result_type(windows, np.float64))
+    buffer[:, :time_steps] = windows
+    for step in range(horizon):
+        predictions = np.asarray(model.predict(buffer[:, step:step + time_steps]))
+        buffer[:, time_steps + step] = predictions.reshape((batch_size,) + sample_shape)
+    return buffer[:, time_steps:]
+
+class CachedQuantumKernel:
+    """Fidelity kernel over ZZFeatureMap encodings, caching statevectors per window and Gram matrices per dataset.
+
+    Each distinct window is encoded by a single circuit simulation, so a Gram matrix costs O(n) circuits plus
+    a blockwise overlap product instead of O(n^2) circuits. Blocks can be computed in parallel threads.
+    One feature map is kept per window width and every cache key includes the width, so a single kernel can
+    serve models with different look-back lengths, e.g. during a search over time_steps.
+    The encoding cache is bounded by max_encoding_bytes, since a statevector of a width-w window takes 16 * 2**w
+    bytes (1 MiB for w = 16).
+    """
+
+    def __init__(self, feature_map=None, max_encoding_bytes=256 * 2 ** 20, max_matrices=16, block_size=256, n_jobs=1):
+        self.feature_maps = {} if feature_map is None else {feature_map.num_parameters: feature_map}
+        self.max_encoding_bytes = max_encoding_bytes
+        self.max_matrices = max_matrices
+        self.block_size = block_size
+        self.n_jobs = n_jobs
+        self.hits = 0
+        self.misses = 0
+        self._encodings = OrderedDict()
+        self._encoding_bytes = 0
+        self._matrices = OrderedDict()
+
+    def _feature_map_for(self, feature_dimension):
+        """Return the feature map for a window width, building a ZZFeatureMap for widths not seen before."""
+        if feature_dimension not in self.feature_maps:
+            self.feature_maps[feature_dimension] = ZZFeatureMap(feature_dimension)
+        return self.feature_maps[feature_dimension]
+
+    def encode(self, X):
+        """Return the encoded statevectors of the rows of X, simulating only windows not seen before."""
+        X = np.asarray(X, dtype=np.float64)
+        X = X.reshape(len(X), -1)
+        feature_map = self._feature_map_for(X.shape[1])
+        states = np.empty((len(X), 2 ** feature_map.num_qubits), dtype=np.complex128)
+        for i, row in enumerate(X):
+            key = (X.shape[1], QuantumUtils.array_fingerprint(row))
+            state = self._encodings.get(key)
+            if state is None:
+                self.misses += 1
+                state = Statevector(feature_map.assign_parameters(row)).data
+                self._encodings[key] = state
+                self._encoding_bytes += state.nbytes
+                while self._encoding_bytes > self.max_encoding_bytes:
+                    self._encoding_bytes -= self._encodings.popitem(last=False)[1].nbytes
+            else:
+                self.hits += 1
+                self._encodings.move_to_end(key)
+            states[i] = state
+        return states
+
+    def evaluate(self, x_vec, y_vec=None):
+        """Return the kernel matrix between the rows of x_vec and y_vec (x_vec itself if omitted)."""
+        x_vec = np.asarray(x_vec)
+        feature_dimension = int(np.prod(x_vec.shape[1:]))
+        key = (feature_dimension, QuantumUtils.array_fingerprint(x_vec),
+               None if y_vec is None else QuantumUtils.array_fingerprint(np.asarray(y_vec)))
+        if key in self._matrices:
+            self._matrices.move_to_end(key)
+            return self._matrices[key]
+        x_states = self.encode(x_vec)
+        y_states = x_states if y_vec is None else self.encode(y_vec)
+        matrix = self._gram_matrix(x_states, y_states, symmetric=y_vec is None)
+        self._matrices[key] = matrix
+        if len(self._matrices) > self.max_matrices:
+            self._matrices.popitem(last=False)
+        return matrix
+
+    def _gram_matrix(self, x_states, y_states, symmetric=False):
+        """Compute |<x|y>|^2 block by block, only over the upper triangle of blocks for symmetric matrices."""
+        matrix = np.empty((len(x_states), len(y_states)))
+        blocks = [(i, j) for i in range(0, len(x_states), self.block_size)
+                  for j in range(i if symmetric else 0, len(y_states), self.block_size)]
+
+        def fill_block(block):
+            i, j = block
+            overlaps = x_states[i:i + self.block_size] @ y_states[j:j + self.block_size].conj().T
+            matrix[i:i + self.block_size, j:j + self.block_size] = np.abs(overlaps) ** 2
+            if symmetric and i != j:
+                matrix[j:j + self.block_size, i:i + self.block_size] = matrix[i:i + self.block_size, j:j + self.block_size].T
+
+        if self.n_jobs == 1:
+            for block in blocks:
+                fill_block(block)
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+                list(executor.map(fill_block, blocks))
+        return matrix
+
+    def stats(self):
+        """Return hit/miss statistics for the encoding cache."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'encodings': len(self._encodings),
+            'encoding_bytes': self._encoding_bytes,
+            'matrices': len(self._matrices),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        """Drop all cached encodings and matrices and reset the statistics."""
+        self._encodings.clear()
+        self._encoding_bytes = 0
+        self._matrices.clear()
+        self.hits = 0
+        self.misses = 0
+
+class QuantumKernelRegressor:
+    """Kernel ridge regression on a precomputed, cached quantum kernel."""
+
+    def __init__(self, kernel, alpha=1e-3):
+        self.kernel = kernel
+        self.alpha = alpha
+        self.regressor = KernelRidge(alpha=alpha, kernel='precomputed')
+        self.X_train = None
+
+    def fit(self, X, y):
+        """Fit the regressor on the Gram matrix of the training windows."""
+        self.X_train = np.asarray(X)
+        self.regressor.fit(self.kernel.evaluate(self.X_train), y)
+        return self
+
+    def predict(self, X):
+        """Predict from the kernel between the given windows and the training windows."""
+        X = np.asarray(X)
+        if X.shape == self.X_train.shape and np.array_equal(X, self.X_train):
+            return self.regressor.predict(self.kernel.evaluate(self.X_train))
+        return self.regressor.predict(self.kernel.evaluate(X, self.X_train))
+
+class StreamingPredictor:
+    """Rolling look-back window over a live series, emitting one prediction per new sample."""
+
+    def __init__(self, model, time_steps, history=None):
+        self.model = model
+        self.time_steps = time_steps
+        self.num_samples = 0
+        self._buffer = None
+        self._position = 0
+        if history is not None:
+            self.extend(history)
+
+    @property
+    def ready(self):
+        """Whether enough samples have arrived to fill the look-back window."""
+        return self.num_samples >= self.time_steps
+
+    def window(self):
+        """Return the current look-back window, oldest sample first, as a view."""
+        if not self.ready:
+            raise ValueError(f"Need {self.time_steps} samples before predicting, got {self.num_samples}")
+        return self._buffer[self._position:self._position + self.time_steps]
+
+    def _push(self, value):
+        """Store a sample in the ring buffer in constant time."""
+        value = np.asarray(value)
+        if self._buffer is None:
+            self._buffer = np.empty((2 * self.time_steps,) + value.shape, dtype=np.result_type(value, np.float64))
+        # Every sample is written twice so the window is always one contiguous slice of the buffer
+        self._buffer[self._position] = value
+        self._buffer[self._position + self.time_steps] = value
+        self._position = (self._position + 1) % self.time_steps
+        self.num_samples += 1
+
+    def extend(self, values):
+        """Append several samples without predicting, e.g. to warm up from history."""
+        values = np.asarray(values)
+        skipped = max(len(values) - self.time_steps, 0)
+        self.num_samples += skipped  # Only the last time_steps samples can still be part of a window
+        for value in values[skipped:]:
+            self._push(value)
+
+    def update(self, value):
+        """Append a new sample and return the prediction for the next one, or None until the window is full."""
+        self._push(value)
+        return self.predict_next() if self.ready else None
+
+    def predict_next(self):
+        """Predict the sample following the current window."""
+        return np.asarray(self.model.predict(self.window()[np.newaxis]))[0]
+
+    def forecast(self, horizon):
+        """Forecast the next horizon samples from the current window."""
+        return _recursive_forecast(self.model, self.window()[np.newaxis], horizon)[0]
 
 class RecurrentQuantumNN:
-    def __init__(self, num_qubits, time_steps, learning_rate=0.01):
+    def __init__(self, num_qubits, time_steps, learning_rate=0.01, kernel=None, kernel_alpha=1e-3):
         self.num_qubits = num_qubits
         self.time_steps = time_steps
         self.learning_rate = learning_rate
@@ -20,21 +237,28 @@ class RecurrentQuantumNN:
         # Quantum simulator
         self.simulator = Aer.get_backend('statevector_simulator')
 
+        # Optional CachedQuantumKernel; when set, models are kernel ridge regressors sharing its encodings
+        self.kernel = kernel
+        self.kernel_alpha = kernel_alpha
+
+        # Validation scores from hyperparameter search, keyed on configuration, data and training size
+        self._score_cache = {}
+
     def build_model(self, data):
         """Create the model and return it after training."""
         X, y = self._prepare_data(data)
-        model = VQC(feature_map=self.feature_map, quantum_instance=self.simulator)
+        if self.kernel is not None:
+            return QuantumKernelRegressor(self.kernel, alpha=self.kernel_alpha).fit(X, y)
+        model = VQC(feature_map=self.feature_map, optimizer=ADAM(lr=self.learning_rate), quantum_instance=self.simulator)
         model.fit(X, y)
         return model
 
-    def _prepare_data(self, data):
+    def _prepare_data(self, data, copy=False):
         """Prepares time series data for recurrent quantum model."""
-        X = []
-        y = []
-        for i in range(len(data) - self.time_steps):
-            X.append(data[i:i + self.time_steps])
-            y.append(data[i + self.time_steps])
-        return np.array(X), np.array(y)
+        data = np.asarray(data)
+        X = QuantumUtils.sliding_windows(data, self.time_steps, num_windows=len(data) - self.time_steps, copy=copy)
+        y = data[self.time_steps:]
+        return X, (y.copy() if copy else y)
 
     def predict(self, model, data):
         """Predict the next value in the time series."""
@@ -42,26 +266,86 @@ class RecurrentQuantumNN:
         predictions = model.predict(X)
         return predictions
 
+    def create_stream(self, model, history=None):
+        """Create a streaming predictor that keeps a rolling window instead of re-windowing the full history."""
+        return StreamingPredictor(model, self.time_steps, history=history)
+
+    def forecast(self, model, data, horizon):
+        """Forecast the next horizon values following the last look-back window of the series."""
+        data = np.asarray(data)
+        if len(data) < self.time_steps:
+            raise ValueError(f"Need at least {self.time_steps} samples to forecast, got {len(data)}")
+        return _recursive_forecast(model, data[np.newaxis, -self.time_steps:], horizon)[0]
+
+    def forecast_batch(self, model, windows, horizon):
+        """Forecast horizon steps for a batch of look-back windows of shape (batch, time_steps, ...) at once."""
+        windows = np.asarray(windows)
+        if windows.ndim < 2 or windows.shape[1] != self.time_steps:
+            raise ValueError(f"Expected windows of shape (batch, {self.time_steps}, ...), got {windows.shape}")
+        return _recursive_forecast(model, windows, horizon)
+
     def evaluate(self, model, data):
         """Evaluate the model performance using mean squared error."""
         X, y_true = self._prepare_data(data)
         y_pred = model.predict(X)
         return mean_squared_error(y_true, y_pred)
 
-    def optimize_hyperparameters(self, data, param_grid):
-        """Optimizes hyperparameters using grid search or other methods."""
-        best_params = {}
-        best_score = float('inf')
-
-        # Basic grid search implementation
-        for params in param_grid:
-            model = self.build_model(data)
-            score = self.evaluate(model, data)
-            if score < best_score:
-                best_score = score
-                best_params = params
-        
-        return best_params, best_score
+    def optimize_hyperparameters(self, data, param_grid, validation_size=0.2, n_jobs=1, successive_halving=False,
+                                 eta=2, min_train_fraction=0.25):
+        """Optimizes hyperparameters using grid search or successive halving.
+
+        Every configuration overrides the constructor arguments (num_qubits, time_steps, learning_rate), is
+        trained on the leading part of the series and scored on the held-out tail. With n_jobs > 1 the
+        candidates of each round are trained in worker processes. Successive halving trains all candidates on
+        a small slice of the training data first and keeps the best 1/eta of them for each larger round.
+        Scores are cached per configuration, data fingerprint and training size across calls. With a kernel
+        set, all candidates share its encoding cache, so windows common to several configurations are only
+        encoded once (worker processes start from a copy of the cache).
+
+        Raises ValueError for grid keys the model does not use: learning_rate only affects the VQC optimizer
+        and kernel_alpha only the kernel regressor.
+        """
+        data = np.asarray(data)
+        candidates = list(ParameterGrid(param_grid)) if isinstance(param_grid, dict) else list(param_grid)
+        if not candidates:
+            return {}, float('inf')
+        used_keys = {'num_qubits', 'time_steps', 'kernel_alpha' if self.kernel is not None else 'learning_rate'}
+        unused_keys = set().union(*candidates) - used_keys
+        if unused_keys:
+            raise ValueError(f"Hyperparameters {sorted(unused_keys)} are not used by this model; "
+                             f"searchable keys are {sorted(used_keys)}")
+        split_index = int(len(data) * (1 - validation_size))
+        fingerprint = QuantumUtils.array_fingerprint(data)
+
+        num_rounds = math.ceil(math.log(len(candidates), eta)) + 1 if successive_halving else 1
+        for round_index in range(num_rounds):
+            fraction = max(eta ** (round_index - num_rounds + 1), min_train_fraction)
+            num_train = split_index if round_index == num_rounds - 1 else max(int(split_index * fraction), 1)
+            scores = self._score_candidates(candidates, data, split_index, num_train, fingerprint, n_jobs)
+            ranking = np.argsort(scores, kind='stable')
+            if round_index < num_rounds - 1:
+                candidates = [candidates[i] for i in ranking[:max(math.ceil(len(candidates) / eta), 1)]]
+
+        best_index = int(ranking[0])
+        return candidates[best_index], scores[best_index]
+
+    def _score_candidates(self, candidates, data, split_index, num_train, fingerprint, n_jobs):
+        """Score configurations, reusing cached scores and fitting the remaining ones serially or in processes."""
+        base_config = {'num_qubits': self.num_qubits, 'time_steps': self.time_steps, 'learning_rate': self.learning_rate,
+                       'kernel_alpha': self.kernel_alpha}
+        configs = [{**base_config, **params} for params in candidates]
+        keys = [(tuple(sorted(config.items())), fingerprint, split_index, num_train) for config in configs]
+        missing = [i for i, key in enumerate(keys) if key not in self._score_cache]
+        if n_jobs == 1:
+            results = [_fit_and_score(configs[i], data, split_index, num_train, self.kernel) for i in missing]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(_fit_and_score, configs[i], data, split_index, num_train, self.kernel)
+                           for i in missing]
+                results = [future.result() for future in futures]
+        for i, score in zip(missing, results):
+            self._score_cache[keys[i]] = score
+        return [self._score_cache[key] for key in keys]
 
     def save_model(self, model, path):
         """Save the quantum model to a file."""
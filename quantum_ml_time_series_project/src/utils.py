@@ -1,8 +1,127 @@
 
 import numpy as np
+import hashlib
+import json
 import logging
 import os
 
+class FeatureStore:
+    """Row-chunked on-disk array store supporting appends and partial reads by row range and column subset.
+
+    Chunks are .npy files read through memory maps, or .npz files when compressed, in which case only the
+    chunks overlapping a requested row range are decompressed. Appends top up the last chunk and add new ones.
+    """
+
+    def __init__(self, directory, chunk_rows=65536, compress=False):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self.compress = compress
+        self.dtype = None
+        self.row_shape = None
+        self.chunk_lengths = []
+        metadata_path = os.path.join(directory, 'metadata.json')
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            self.chunk_rows = metadata['chunk_rows']
+            self.compress = metadata['compress']
+            self.dtype = np.dtype(metadata['dtype'])
+            self.row_shape = tuple(metadata['row_shape'])
+            self.chunk_lengths = metadata['chunk_lengths']
+
+    def __len__(self):
+        return sum(self.chunk_lengths)
+
+    @property
+    def shape(self):
+        """Shape of the stored array."""
+        return (len(self),) + (self.row_shape or ())
+
+    def _chunk_path(self, index):
+        """Path of a chunk file."""
+        return os.path.join(self.directory, f"chunk_{index:06d}.{'npz' if self.compress else 'npy'}")
+
+    def _write_chunk(self, index, chunk):
+        """Write a chunk next to its path and swap it in, so readers never see a partial file."""
+        path = self._chunk_path(index)
+        with open(path + '.tmp', 'wb') as f:
+            if self.compress:
+                np.savez_compressed(f, data=chunk)
+            else:
+                np.save(f, chunk)
+        os.replace(path + '.tmp', path)
+
+    def _read_chunk(self, index):
+        """Return a chunk, memory-mapped when stored uncompressed."""
+        if self.compress:
+            with np.load(self._chunk_path(index)) as saved:
+                return saved['data']
+        return np.load(self._chunk_path(index), mmap_mode='r')
+
+    def _save_metadata(self):
+        """Atomically record the layout of the store."""
+        metadata_path = os.path.join(self.directory, 'metadata.json')
+        metadata = {'chunk_rows': self.chunk_rows, 'compress': self.compress, 'dtype': self.dtype.str,
+                    'row_shape': list(self.row_shape), 'chunk_lengths': self.chunk_lengths}
+        with open(metadata_path + '.tmp', 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(metadata_path + '.tmp', metadata_path)
+
+    def write(self, array, chunk_rows=None, compress=None):
+        """Replace the stored array, optionally changing the chunk size and compression."""
+        for index in range(len(self.chunk_lengths)):
+            os.remove(self._chunk_path(index))
+        self.chunk_rows = chunk_rows or self.chunk_rows
+        self.compress = self.compress if compress is None else compress
+        self.dtype = None
+        self.row_shape = None
+        self.chunk_lengths = []
+        return self.append(array)
+
+    def append(self, array):
+        """Append rows, e.g. a new time range, without rewriting more than the last partial chunk."""
+        array = np.asarray(array)
+        if self.dtype is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.dtype = array.dtype
+            self.row_shape = array.shape[1:]
+        elif array.shape[1:] != self.row_shape:
+            raise ValueError(f"Rows of shape {array.shape[1:]} cannot be appended to a store of {self.row_shape} rows")
+        array = array.astype(self.dtype, copy=False)
+
+        start = 0
+        if self.chunk_lengths and self.chunk_lengths[-1] < self.chunk_rows:
+            start = min(self.chunk_rows - self.chunk_lengths[-1], len(array))
+            last = np.concatenate([self._read_chunk(len(self.chunk_lengths) - 1), array[:start]])
+            self._write_chunk(len(self.chunk_lengths) - 1, last)
+            self.chunk_lengths[-1] = len(last)
+        for offset in range(start, len(array), self.chunk_rows):
+            chunk = array[offset:offset + self.chunk_rows]
+            self._write_chunk(len(self.chunk_lengths), chunk)
+            self.chunk_lengths.append(len(chunk))
+        self._save_metadata()
+        return self
+
+    def read(self, start=0, stop=None, columns=None):
+        """Read rows [start, stop) and optionally a subset of columns, touching only the overlapping chunks."""
+        if self.dtype is None:
+            raise FileNotFoundError(f"No feature store at {self.directory}")
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(stop, start)
+        column_index = (slice(None),) if columns is None else (slice(None), columns)
+        offsets = np.concatenate(([0], np.cumsum(self.chunk_lengths, dtype=np.int64)))
+        first = max(int(np.searchsorted(offsets, start, side='right')) - 1, 0)
+        parts = []
+        for index in range(first, len(self.chunk_lengths)):
+            if offsets[index] >= stop:
+                break
+            chunk = self._read_chunk(index)
+            rows = slice(max(start - offsets[index], 0), min(stop - offsets[index], self.chunk_lengths[index]))
+            parts.append(np.asarray(chunk[rows][column_index]))
+        if not parts:
+            return np.empty((0,) + self.row_shape, dtype=self.dtype)[column_index]
+        return np.concatenate(parts)
+
 class QuantumUtils:
     @staticmethod
     def normalize_data(data):
@@ -28,20 +147,69 @@ class QuantumUtils:
             os.makedirs(directory)
 
     @staticmethod
-    def save_numpy_array(array, file_path):
-        """Save a NumPy array to a binary file."""
-        np.save(file_path, array)
+    def save_numpy_array(array, file_path, chunk_rows=None, compress=False, append=False):
+        """Save a NumPy array to a binary file.
+
+        With chunk_rows, compress or append the array goes to a FeatureStore directory at file_path instead,
+        which later reads can slice by row range and column subset. Appending to a plain .npy file first
+        converts it into a FeatureStore holding the same rows.
+        """
+        if chunk_rows is None and not compress and not append:
+            np.save(file_path, array)
+            return
+        if append and os.path.isfile(file_path):
+            existing = np.load(file_path, mmap_mode='r')
+            staging_path = file_path + '.store'
+            FeatureStore(staging_path, chunk_rows=chunk_rows or 65536, compress=compress).write(existing)
+            del existing
+            os.remove(file_path)
+            os.replace(staging_path, file_path)
+        store = FeatureStore(file_path, chunk_rows=chunk_rows or 65536, compress=compress)
+        if append:
+            store.append(array)
+        else:
+            store.write(array, chunk_rows=chunk_rows, compress=compress)
 
     @staticmethod
-    def load_numpy_array(file_path):
-        """Load a NumPy array from a binary file."""
-        return np.load(file_path)
+    def load_numpy_array(file_path, start=0, stop=None, columns=None, mmap_mode=None):
+        """Load a NumPy array, or rows [start, stop) and a column subset of it, from a file or FeatureStore."""
+        if os.path.isdir(file_path):
+            return FeatureStore(file_path).read(start, stop, columns)
+        if start == 0 and stop is None and columns is None:
+            return np.load(file_path, mmap_mode=mmap_mode)
+        # Partial reads go through a memory map so only the requested rows are read from disk
+        array = np.load(file_path, mmap_mode=mmap_mode or 'r')[start:stop]
+        return np.array(array if columns is None else array[:, columns])
 
     @staticmethod
     def calculate_moving_average(data, window_size=3):
         """Calculate the moving average of a given dataset."""
         return np.convolve(data, np.ones(window_size), 'valid') / window_size
 
+    @staticmethod
+    def sliding_windows(data, window_size, num_windows=None, copy=False):
+        """Return consecutive windows of window_size samples along the first axis as a zero-copy view.
+
+        The result has shape (num_windows, window_size, *data.shape[1:]); pass copy=True for a writable copy.
+        """
+        data = np.asarray(data)
+        available = max(len(data) - window_size + 1, 0)
+        num_windows = available if num_windows is None else min(max(num_windows, 0), available)
+        if num_windows == 0:
+            windows = np.empty((0, window_size) + data.shape[1:], dtype=data.dtype)
+        else:
+            windows = np.lib.stride_tricks.sliding_window_view(data, window_size, axis=0)
+            windows = np.moveaxis(windows, -1, 1)[:num_windows]
+        return windows.copy() if copy else windows
+
+    @staticmethod
+    def array_fingerprint(data):
+        """Return a stable hex digest of an array's shape, dtype and contents, for use as a cache key."""
+        data = np.ascontiguousarray(data)
+        digest = hashlib.sha1(f'{data.shape}{data.dtype.str}'.encode())
+        digest.update(memoryview(data).cast('B'))
+        return digest.hexdigest()
+
     @staticmethod
     def split_time_series(data, split_ratio=0.8):
         """Split the time series data into training and testing datasets."""
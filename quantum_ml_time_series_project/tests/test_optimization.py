@@ -1,7 +1,12 @@
 
 import unittest
 import numpy as np
-from src.optimization import QuantumOptimization
+import threading
+from src.optimization import QuantumOptimization, ObjectiveCache, _run_minimize
+
+def multimodal_objective(params):
+    """Picklable objective with several local minima, used by the multi-start tests."""
+    return float(np.sum(np.sin(3 * params) + 0.1 * params ** 2))
 
 class TestQuantumOptimization(unittest.TestCase):
     def setUp(self):
@@ -31,6 +36,58 @@ class TestQuantumOptimization(unittest.TestCase):
         results = self.optimizer.evaluate_quantum_circuit(circuit)
         self.assertIsInstance(results, dict)
 
+    def test_variational_circuit_is_cached(self):
+        """Test that repeated calls bind parameters without rebuilding the transpiled circuit."""
+        self.optimizer.quantum_variational_circuit(np.random.rand(2))
+        cached = self.optimizer.variational_qc
+        circuit = self.optimizer.quantum_variational_circuit(np.random.rand(2))
+        self.assertIs(self.optimizer.variational_qc, cached)
+        self.assertEqual(len(circuit.parameters), 0)
+
+    def test_evaluate_parameter_batch(self):
+        """Test that a batch of parameter vectors yields one set of counts per vector."""
+        param_batch = np.array([[0.0, 0.0], [np.pi, 0.0], [0.3, 1.2]])
+        counts = self.optimizer.evaluate_parameter_batch(param_batch, shots=256)
+        self.assertEqual(len(counts), 3)
+        self.assertEqual(counts[0], {'00': 256})
+        self.assertEqual(counts[1], {'11': 256})
+
+    def test_expectation_batch(self):
+        """Test that parity expectations are returned as an array aligned with the batch."""
+        param_batch = np.array([[0.0, 0.0], [0.0, np.pi]])
+        expectations = self.optimizer.expectation_batch(param_batch, shots=256)
+        self.assertTrue(np.allclose(expectations, [1.0, -1.0]))
+
+    def test_parameter_shift_gradient(self):
+        """Test that the parameter-shift gradient matches the analytic derivative of the parity expectation."""
+        params = np.array([0.4, 1.0])
+        gradient = self.optimizer.parameter_shift_gradient(params, shots=20000)
+        self.assertTrue(np.allclose(gradient, [0.0, -np.sin(1.0)], atol=0.05))
+
+    def test_optimize_with_gradient(self):
+        """Test gradient-based optimization with finite differences and with Adam."""
+        def objective_function(params):
+            return np.sum((params - 1) ** 2)
+
+        initial_params = np.zeros(3)
+        result = self.optimizer.optimize(objective_function, initial_params, method='L-BFGS-B', jac='finite-difference')
+        self.assertTrue(np.allclose(result.x, 1.0, atol=1e-4))
+        result = self.optimizer.optimize(objective_function, initial_params, method='adam')
+        self.assertTrue(result.success)
+        self.assertTrue(np.allclose(result.x, 1.0, atol=1e-3))
+        result = self.optimizer.optimize(objective_function, initial_params, method='Adam')
+        self.assertTrue(result.success, "Method names should be case-insensitive")
+
+    def test_adam_reports_unconverged_runs(self):
+        """Test that Adam reports failure when maxiter runs out before the gradient tolerance is met."""
+        def objective_function(params):
+            return np.sum((params - 1) ** 2)
+
+        result = self.optimizer.adam_optimize(objective_function, None, np.zeros(3), maxiter=3)
+        self.assertFalse(result.success)
+        self.assertEqual(result.nit, 3)
+        self.assertIn('Maximum number of iterations', result.message)
+
     def test_optimize_variational_circuit(self):
         """Test the optimization of a variational quantum circuit over iterations."""
         def objective_function(params):
@@ -40,6 +97,86 @@ class TestQuantumOptimization(unittest.TestCase):
         best_params = self.optimizer.optimize_variational_circuit(objective_function, initial_params, iterations=10)
         self.assertIsNotNone(best_params)
 
+    def test_multi_start_optimize(self):
+        """Test that parallel restarts return a summary covering every run."""
+        summary = self.optimizer.multi_start_optimize(multimodal_objective, np.zeros(2), num_starts=6, max_workers=2, seed=0)
+        self.assertEqual(summary['num_completed'], 6)
+        self.assertFalse(summary['terminated_early'])
+        self.assertEqual(summary['best_value'], min(run['value'] for run in summary['runs']))
+
+    def test_multi_start_with_unpicklable_objective(self):
+        """Test that multi-start restarts of a lambda objective fall back to threads."""
+        best_params = self.optimizer.optimize_variational_circuit(lambda params: np.sum((params - 0.5) ** 2), np.zeros(2),
+                                                                  iterations=4, multi_start=True, max_workers=2, seed=0)
+        self.assertEqual(self.optimizer.multi_start_summary['executor'], 'thread')
+        self.assertTrue(np.allclose(best_params, 0.5, atol=1e-2))
+
+    def test_multi_start_early_termination(self):
+        """Test that remaining restarts are skipped once the target value is reached."""
+        summary = self.optimizer.multi_start_optimize(multimodal_objective, np.zeros(2), num_starts=32, max_workers=1,
+                                                      target_value=0.0, seed=0)
+        self.assertTrue(summary['terminated_early'])
+        self.assertLess(summary['num_completed'], 32)
+        self.assertLessEqual(summary['best_value'], 0.0)
+
+    def test_stop_event_aborts_in_flight_run(self):
+        """Test that a restart stops at its next iteration once the shared stop flag is set."""
+        stop_event = threading.Event()
+        stop_event.set()
+        result = _run_minimize(multimodal_objective, np.array([0.3, -0.2]), 'L-BFGS-B', None, stop_event)
+        self.assertFalse(result.success)
+        self.assertLessEqual(result.nit, 1)
+
+    def test_objective_cache(self):
+        """Test that the objective cache reuses values within tolerance and evicts least recently used entries."""
+        calls = []
+
+        def objective_function(params):
+            calls.append(params)
+            return np.sum(params ** 2)
+
+        cache = ObjectiveCache(objective_function, maxsize=2, tolerance=1e-6)
+        cache(np.array([1.0, 2.0]))
+        cache(np.array([1.0 + 1e-9, 2.0]))
+        cache(np.array([3.0, 4.0]))
+        cache(np.array([5.0, 6.0]))
+        cache(np.array([1.0, 2.0]))
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_optimize_variational_circuit_with_cache(self):
+        """Test that restarts from the previous best point are served from the cache."""
+        optimizer = QuantumOptimization(num_qubits=self.num_qubits, cache_size=128)
+        calls = []
+
+        def objective_function(params):
+            calls.append(params)
+            return np.sum(params ** 2)
+
+        optimizer.optimize_variational_circuit(objective_function, np.array([0.5, -0.5]), iterations=5)
+        stats = optimizer.cache_stats()
+        self.assertEqual(stats['misses'], len(calls))
+        self.assertGreater(stats['hits'], 0)
+
+    def test_cache_does_not_flatten_gradients(self):
+        """Test that a coarse cache tolerance does not zero out numerically estimated gradients."""
+        optimizer = QuantumOptimization(num_qubits=self.num_qubits, cache_size=1000, cache_tolerance=1e-4)
+
+        def objective_function(params):
+            return np.sum((params - 1) ** 2)
+
+        for jac in (None, 'finite-difference', '2-point', '3-point'):
+            result = optimizer.optimize(objective_function, np.zeros(2), method='L-BFGS-B', jac=jac)
+            self.assertTrue(np.allclose(result.x, 1.0, atol=1e-3))
+
+    def test_objective_caches_are_bounded(self):
+        """Test that caches for short-lived objectives are evicted."""
+        optimizer = QuantumOptimization(num_qubits=self.num_qubits, cache_size=16, max_cached_objectives=3)
+        for shift in range(5):
+            optimizer.optimize(lambda params, shift=shift: np.sum((params - shift) ** 2), np.zeros(2))
+        self.assertEqual(len(optimizer.objective_caches), 3)
+
     def test_optimize_with_penalty(self):
         """Test the optimization process with a penalty applied to parameters."""
         def objective_function(params):
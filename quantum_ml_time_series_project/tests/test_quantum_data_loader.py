@@ -1,7 +1,9 @@
 
 import unittest
+import os
 import numpy as np
 import pandas as pd
+from qiskit import QuantumCircuit
 from src.quantum_data_loader import QuantumDataLoader
 
 class TestQuantumDataLoader(unittest.TestCase):
@@ -25,6 +27,26 @@ class TestQuantumDataLoader(unittest.TestCase):
         preprocessed_data = self.data_loader.preprocess(data, scale=True)
         self.assertEqual(preprocessed_data.shape, (3, self.num_qubits))
 
+    def test_preprocess_reuses_fitted_scaler(self):
+        """Test that test data is transformed with the scaler fitted on training data."""
+        train = np.array([[0.0, 10.0], [4.0, 20.0]])
+        test = np.array([[2.0, 15.0]])
+        self.data_loader.preprocess(train, scale=True)
+        transformed = self.data_loader.preprocess(test, scale=True, fit=False)
+        self.assertTrue(np.allclose(transformed, [[0.5, 0.5]]))
+
+    def test_incremental_scaler(self):
+        """Test that chunk-wise fitting matches fitting on the whole array and survives a save/load round trip."""
+        data = np.random.rand(100, self.num_qubits) * 5
+        batches = np.vstack(list(self.data_loader.batch_generator(data, 16, scale=True)))
+        self.assertTrue(np.isclose(batches.min(), 0.0) and np.isclose(batches.max(), 1.0))
+        path = 'test_scaler.npz'
+        self.data_loader.save_scaler(path)
+        loaded_loader = QuantumDataLoader(num_qubits=self.num_qubits)
+        loaded_loader.load_scaler(path)
+        self.assertTrue(np.allclose(loaded_loader.scaler.transform(data), self.data_loader.scaler.transform(data)))
+        os.remove(path)
+
     def test_split_train_test(self):
         """Test splitting data into training and testing sets."""
         data = np.random.rand(100, self.num_qubits)
@@ -40,6 +62,140 @@ class TestQuantumDataLoader(unittest.TestCase):
         self.assertEqual(len(batches), 10)
         self.assertEqual(batches[0].shape, (batch_size, self.num_qubits))
 
+    def test_load_csv_memmap(self):
+        """Test chunked conversion of a CSV file into a memory-mapped cache."""
+        data = pd.DataFrame(np.random.rand(105, self.num_qubits), columns=['a', 'b'])
+        path = 'test_memmap_data.csv'
+        cache_path = 'test_memmap_data.npy'
+        data.to_csv(path, index=False)
+        mapped = self.data_loader.load_csv_memmap(path, cache_path=cache_path, chunksize=10)
+        self.assertIsInstance(mapped, np.memmap)
+        self.assertTrue(np.allclose(mapped, data.to_numpy(dtype=np.float32)))
+        del mapped
+        os.remove(path)
+        os.remove(cache_path)
+        os.remove(cache_path + '.json')
+
+    def test_memmap_cache_tracks_options(self):
+        """Test that the memmap cache is rebuilt when usecols or dtype change."""
+        data = pd.DataFrame(np.random.rand(20, 3), columns=['a', 'b', 'c'])
+        path = 'test_memmap_options.csv'
+        cache_path = 'test_memmap_options.npy'
+        data.to_csv(path, index=False)
+        mapped = self.data_loader.load_csv_memmap(path, cache_path=cache_path)
+        self.assertEqual(mapped.shape, (20, 3))
+        mapped = self.data_loader.load_csv_memmap(path, cache_path=cache_path, usecols=['a', 'c'])
+        self.assertTrue(np.allclose(mapped, data[['a', 'c']].to_numpy(dtype=np.float32)))
+        mapped = self.data_loader.load_csv_memmap(path, cache_path=cache_path, usecols=['a', 'c'], dtype=np.float64)
+        self.assertEqual(mapped.dtype, np.float64)
+        self.assertTrue(np.allclose(mapped, data[['a', 'c']].to_numpy()))
+        del mapped
+        os.remove(path)
+        os.remove(cache_path)
+        os.remove(cache_path + '.json')
+
+    def test_csv_to_memmap_removes_scratch_file_on_failure(self):
+        """Test that a failing CSV read does not leave the scratch file behind."""
+        path = 'test_memmap_bad.csv'
+        cache_path = 'test_memmap_bad.npy'
+        pd.DataFrame({'time': ['2024-01-01', '2024-01-02'], 'value': [1.0, 2.0]}).to_csv(path, index=False)
+        with self.assertRaises(ValueError):
+            self.data_loader.csv_to_memmap(path, cache_path=cache_path)
+        self.assertFalse(os.path.exists(cache_path + '.part'))
+        self.assertFalse(os.path.exists(cache_path))
+        os.remove(path)
+
+    def test_batch_generator_from_file(self):
+        """Test generating batches directly from a CSV file through its memory-mapped cache."""
+        data = pd.DataFrame(np.random.rand(25, self.num_qubits), columns=['a', 'b'])
+        path = 'test_batch_data.csv'
+        data.to_csv(path, index=False)
+        batches = list(self.data_loader.batch_generator(path, 10))
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        del batches
+        os.remove(path)
+        os.remove('test_batch_data.npy')
+        os.remove('test_batch_data.npy.json')
+
+    def test_batch_generator_from_file_with_usecols(self):
+        """Test that usecols lets a CSV with a timestamp column be served in batches."""
+        data = pd.DataFrame(np.random.rand(25, self.num_qubits), columns=['a', 'b'])
+        data.insert(0, 'time', pd.date_range('2024-01-01', periods=25, freq='h').astype(str))
+        path = 'test_batch_timestamps.csv'
+        data.to_csv(path, index=False)
+        batches = list(self.data_loader.batch_generator(path, 10, usecols=['a', 'b']))
+        self.assertTrue(np.allclose(np.vstack(batches), data[['a', 'b']].to_numpy(dtype=np.float32)))
+        del batches
+        os.remove(path)
+        os.remove('test_batch_timestamps.npy')
+        os.remove('test_batch_timestamps.npy.json')
+
+    def test_prefetch_batches(self):
+        """Test that the prefetching pipeline yields scaled batches in order and reports its counters."""
+        data = np.random.rand(100, self.num_qubits)
+        pipeline = self.data_loader.prefetch_batches(data, 16, prefetch=3, num_workers=2, scale=True)
+        batches = list(pipeline)
+        self.assertTrue(np.allclose(np.vstack(batches), self.data_loader.scaler.transform(data)))
+        stats = pipeline.stats()
+        self.assertEqual(stats['batches_consumed'], 7)
+        self.assertEqual(stats['batches_produced'], 7)
+        self.assertEqual(stats['in_flight'], 0)
+
+    def test_augment_batches(self):
+        """Test that lazy augmentation reproduces the eager result for the same seed."""
+        data = np.random.rand(50, self.num_qubits)
+        for methods in [('jitter',), ('scaling',), ('window_warp',), ('scaling', 'window_warp', 'jitter')]:
+            eager = self.data_loader.augment_data(data, augmentation_factor=3, methods=methods, seed=7)
+            lazy = np.vstack(list(self.data_loader.augment_batches(data, 16, augmentation_factor=3, methods=methods,
+                                                                   seed=7)))
+            self.assertEqual(eager.shape, (150, self.num_qubits))
+            self.assertTrue(np.allclose(eager, lazy), f"Lazy and eager results differ for {methods}")
+
+    def test_augment_batch_methods(self):
+        """Test that scaling and window-warp augmentations preserve the batch shape."""
+        batch = np.random.rand(40, self.num_qubits)
+        rng = np.random.default_rng(0)
+        augmented = self.data_loader.augment_batch(batch, rng, methods=('scaling', 'window_warp', 'jitter'))
+        self.assertEqual(augmented.shape, batch.shape)
+        with self.assertRaises(ValueError):
+            self.data_loader.augment_batch(batch, rng, methods=('unknown',))
+
+    def test_sample_circuits(self):
+        """Test that many circuits are sampled at once into integer outcomes and counts."""
+        circuit = QuantumCircuit(self.num_qubits)
+        circuit.h(0)
+        circuit.x(1)
+        circuit.measure_all()
+        for method in ('aer', 'local'):
+            samples = self.data_loader.sample_circuits([circuit] * 3, shots=200, method=method, seed=1)
+            self.assertEqual(len(samples), 3)
+            outcomes, counts = samples[0]
+            self.assertTrue(np.array_equal(outcomes, [2, 3]))
+            self.assertEqual(counts.sum(), 200)
+        expanded = self.data_loader.sample_circuits([circuit] * 2, shots=50, method='local', expand=True)
+        self.assertEqual(expanded.shape, (2, 50))
+
+    def test_local_sampling_matches_aer_outcomes(self):
+        """Test that local sampling reports outcomes over the measured classical bits like aer."""
+        partial = QuantumCircuit(3, 1)
+        partial.x(2)
+        partial.h(0)
+        partial.measure(0, 0)
+        swapped = QuantumCircuit(2, 2)
+        swapped.x(0)
+        swapped.measure([0, 1], [1, 0])
+        mid_circuit = QuantumCircuit(1, 1)
+        mid_circuit.x(0)
+        mid_circuit.measure(0, 0)
+        mid_circuit.x(0)
+        mid_circuit.measure(0, 0)
+        circuits = [partial, swapped, mid_circuit]
+        for method in ('aer', 'local'):
+            samples = self.data_loader.sample_circuits(circuits, shots=200, method=method, seed=1)
+            self.assertTrue(np.array_equal(samples[0][0], [0, 1]), method)
+            self.assertTrue(np.array_equal(samples[1][0], [2]), method)
+            self.assertTrue(np.array_equal(samples[2][0], [0]), method)
+
     def test_save_and_load_data(self):
         """Test saving and loading processed quantum data from a file."""
         data = np.random.rand(100, self.num_qubits)
@@ -1,6 +1,9 @@
 
+import os
+import shutil
 import unittest
 import numpy as np
+from sklearn.feature_selection import mutual_info_regression
 from src.quantum_feature_extraction import QuantumFeatureExtraction
 
 class TestQuantumFeatureExtraction(unittest.TestCase):
@@ -15,6 +18,37 @@ class TestQuantumFeatureExtraction(unittest.TestCase):
         components = self.feature_extractor.extract_principal_components(data, n_components=2)
         self.assertEqual(components.shape, (100, 2))
 
+    def test_principal_components_reuse(self):
+        """Test that the fitted PCA projects new data without being refitted."""
+        data = np.random.rand(100, self.num_qubits)
+        components = self.feature_extractor.extract_principal_components(data, n_components=2)
+        projected = self.feature_extractor.extract_principal_components(data[:10], fit=False)
+        self.assertTrue(np.allclose(projected, components[:10]))
+
+    def test_partial_fit_does_not_replace_full_pca(self):
+        """Test that a full-batch PCA is only replaced by incremental updates when a refit is requested."""
+        data = np.random.rand(100, self.num_qubits)
+        self.feature_extractor.extract_principal_components(data, n_components=2)
+        with self.assertRaises(ValueError):
+            self.feature_extractor.partial_fit_pca(data[:20])
+        pca = self.feature_extractor.partial_fit_pca(data[:20], refit=True)
+        self.assertEqual(pca.n_samples_seen_, 20)
+
+    def test_incremental_pca(self):
+        """Test batched incremental PCA fitting and restoring it from disk."""
+        data = np.random.rand(200, 2) @ np.random.rand(2, 5)
+        self.feature_extractor.fit_pca(data, n_components=2, batch_size=32)
+        projected = self.feature_extractor.transform_principal_components(data)
+        self.assertEqual(projected.shape, (200, 2))
+        path = 'test_pca.npz'
+        self.feature_extractor.save_pca(path)
+        restored = QuantumFeatureExtraction(num_qubits=self.num_qubits)
+        restored.load_pca(path)
+        self.assertTrue(np.allclose(restored.transform_principal_components(data), projected))
+        restored.partial_fit_pca(data[:50])
+        self.assertEqual(restored.pca.n_samples_seen_, 250)
+        os.remove(path)
+
     def test_quantum_mutual_information(self):
         """Test calculation of mutual information between features and target."""
         X = np.random.rand(100, self.num_qubits)
@@ -22,17 +56,80 @@ class TestQuantumFeatureExtraction(unittest.TestCase):
         mi = self.feature_extractor.quantum_mutual_information(X, y)
         self.assertEqual(len(mi), self.num_qubits)
 
+    def test_parallel_subsampled_mutual_information(self):
+        """Test parallel, subsampled mutual information with standard errors and cached scores."""
+        X = np.random.rand(400, 6)
+        y = 3 * X[:, 0] + 0.1 * np.random.rand(400)
+        scores, errors = self.feature_extractor.quantum_mutual_information(
+            X, y, n_jobs=2, sample_size=200, n_repeats=3, random_state=0, return_std=True)
+        self.assertEqual(scores.shape, (6,))
+        self.assertEqual(errors.shape, (6,))
+        self.assertEqual(int(np.argmax(scores)), 0)
+        cached = self.feature_extractor.quantum_mutual_information(X, y, n_jobs=2, sample_size=200, n_repeats=3, random_state=0)
+        self.assertTrue(np.array_equal(cached, scores))
+        serial = self.feature_extractor.quantum_mutual_information(X, y, sample_size=200, n_repeats=3, random_state=0,
+                                                                   use_cache=False)
+        self.assertTrue(np.array_equal(serial, scores), "Scores should not depend on n_jobs")
+        full = self.feature_extractor.quantum_mutual_information(X, y, n_jobs=2, random_state=0, use_cache=False)
+        self.assertTrue(np.array_equal(full, mutual_info_regression(X, y, random_state=0)))
+
     def test_apply_quantum_entanglement(self):
         """Test transformation of features using quantum entanglement operations."""
         data = np.random.rand(100, self.num_qubits)
         entangled_data = self.feature_extractor.apply_quantum_entanglement(data)
         self.assertEqual(entangled_data.shape, (100, self.num_qubits))
 
+    def test_apply_quantum_entanglement_in_place_and_chunked(self):
+        """Test in-place, float32 and chunked memory-mapped entanglement against the elementwise transform."""
+        data = np.random.rand(50, self.num_qubits) * 10
+        expected = np.sin(data) ** 2 + np.cos(data) ** 2
+        in_place = data.copy()
+        result = self.feature_extractor.apply_quantum_entanglement(in_place, out=in_place)
+        self.assertIs(result, in_place)
+        self.assertTrue(np.allclose(in_place, expected))
+        single = self.feature_extractor.apply_quantum_entanglement(data, dtype=np.float32)
+        self.assertEqual(single.dtype, np.float32)
+        self.assertTrue(np.allclose(single, expected, atol=1e-6))
+        path = 'test_entanglement_input.npy'
+        np.save(path, data)
+        mapped = np.load(path, mmap_mode='r')
+        chunked = self.feature_extractor.apply_quantum_entanglement(mapped, chunk_size=7)
+        self.assertTrue(np.allclose(chunked, expected))
+        del mapped
+        os.remove(path)
+
     def test_extract_temporal_quantum_features(self):
         """Test extraction of temporal quantum-specific features from time series data."""
         time_series_data = np.random.rand(100)
         temporal_features = self.feature_extractor.extract_temporal_quantum_features(time_series_data, look_back=3)
         self.assertEqual(temporal_features.shape[0], 100 - 3)
+        for length in (0, 2, 3):
+            short_features = self.feature_extractor.extract_temporal_quantum_features(np.random.rand(length), look_back=3)
+            self.assertEqual(short_features.shape, (0,))
+
+    def test_extract_rolling_features(self):
+        """Test rolling statistics for several window sizes against direct computation on each window."""
+        series = np.random.rand(60) + 10
+        features, names = self.feature_extractor.extract_rolling_features(series, window_sizes=(2, 5), return_names=True)
+        self.assertEqual(features.shape, (56, 12))
+        self.assertEqual(names[6:8], ['mean_5', 'var_5'])
+        for row in (0, 17, 55):
+            window = series[row:row + 5]
+            centered = window - window.mean()
+            expected = [window.mean(), window.var(), window.min(), window.max(),
+                        np.polyfit(np.arange(5), window, 1)[0],
+                        np.sum(centered[:-1] * centered[1:]) / np.sum(centered ** 2)]
+            self.assertTrue(np.allclose(features[row, 6:], expected))
+            self.assertAlmostEqual(features[row, 2], series[row + 3:row + 5].min())
+
+    def test_rolling_features_on_long_trending_series(self):
+        """Test that rolling moments stay accurate at the end of a long trending series."""
+        t = np.arange(1_000_000, dtype=float)
+        series = 0.01 * t + np.sin(t)
+        features = self.feature_extractor.extract_rolling_features(series, window_sizes=(4,), features=('var', 'slope'))
+        windows = np.lib.stride_tricks.sliding_window_view(series[-1003:], 4)
+        self.assertTrue(np.allclose(features[-1000:, 0], windows.var(axis=1), atol=1e-8))
+        self.assertTrue(np.allclose(features[-1000:, 1], np.polyfit(np.arange(4), windows.T, 1)[0], atol=1e-8))
 
     def test_save_and_load_features(self):
         """Test saving and loading extracted features from a file."""
@@ -42,5 +139,15 @@ class TestQuantumFeatureExtraction(unittest.TestCase):
         loaded_features = self.feature_extractor.load_features(path)
         self.assertTrue(np.array_equal(data, loaded_features))
 
+    def test_compressed_feature_store(self):
+        """Test appending a new time range to compressed features and loading only a slice of it."""
+        data = np.random.rand(300, self.num_qubits)
+        path = 'test_feature_store'
+        self.feature_extractor.save_features(data[:200], path, chunk_rows=50, compress=True)
+        self.feature_extractor.save_features(data[200:], path, append=True)
+        week = self.feature_extractor.load_features(path, start=180, stop=230, columns=[1])
+        self.assertTrue(np.array_equal(week, data[180:230, [1]]))
+        shutil.rmtree(path)
+
 if __name__ == '__main__':
     unittest.main()
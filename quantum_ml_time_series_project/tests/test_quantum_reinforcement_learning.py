@@ -1,7 +1,26 @@
 
 import unittest
+import os
+import shutil
 import numpy as np
-from src.quantum_reinforcement_learning import QuantumReinforcementLearningAgent
+from src.quantum_reinforcement_learning import (QuantumReinforcementLearningAgent, SumTree, SparseQTable,
+                                                VectorizedEnvironmentRunner)
+
+class BitFlipEnvironment:
+    """Toy environment whose action flips one bit; the episode ends when all bits are set."""
+
+    def __init__(self, num_bits=3):
+        self.num_bits = num_bits
+        self.state = np.zeros(num_bits, dtype=int)
+
+    def reset(self):
+        self.state = np.zeros(self.num_bits, dtype=int)
+        return self.state.copy()
+
+    def step(self, action):
+        self.state[action % self.num_bits] ^= 1
+        done = bool(self.state.all())
+        return self.state.copy(), float(done), done
 
 class TestQuantumReinforcementLearning(unittest.TestCase):
     def setUp(self):
@@ -31,6 +50,21 @@ class TestQuantumReinforcementLearning(unittest.TestCase):
         action = self.agent.act(state)
         self.assertEqual(action, 2)
 
+    def test_state_index(self):
+        """Test that bit-vector states are packed into Q-table indices, singly and in batches."""
+        self.assertEqual(self.agent._state_index(np.array([0, 1, 1])), 3)
+        states = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 1]])
+        self.assertTrue(np.array_equal(self.agent._state_index(states), [0, 4, 7]))
+
+    def test_validate_encoding(self):
+        """Test that the circuit validation path agrees with the fast index path."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=self.num_qubits, action_space=self.action_space,
+                                                  validate_encoding=True)
+        agent.epsilon = 0.0
+        agent.q_table[6, 1] = 10
+        self.assertEqual(agent.act(np.array([1, 1, 0])), 1)
+        self.assertEqual(agent.act(np.array([1, 1, 0])), 1)
+
     def test_learn(self):
         """Test the learning process and Q-table update."""
         state = np.array([0, 1, 0])
@@ -56,6 +90,183 @@ class TestQuantumReinforcementLearning(unittest.TestCase):
         self.agent.remember(state, action, reward, next_state, done)
         self.assertEqual(len(self.agent.memory), 1)
 
+    def test_memory_ring_buffer(self):
+        """Test that the replay memory overwrites the oldest transitions once full."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=self.num_qubits, action_space=self.action_space, memory_size=3)
+        for action in range(5):
+            agent.remember(np.array([0, 0, 1]), action % self.action_space, 1.0, np.array([1, 0, 0]), False)
+        self.assertEqual(len(agent.memory), 3)
+        self.assertEqual(sorted(agent.memory.actions.tolist()), [0, 2, 3])
+
+    def test_replay(self):
+        """Test that a replayed batch updates the Q-table for every sampled transition at once."""
+        states = np.array([[0, 0, 1], [0, 1, 0], [0, 0, 1]])
+        for i, state in enumerate(states):
+            self.agent.remember(state, 1, 1.0, np.array([1, 1, 1]), i == 2)
+        td_errors = self.agent.replay(3)
+        self.assertEqual(len(td_errors), 3)
+        self.assertAlmostEqual(self.agent.q_table[1, 1], 2 * self.agent.alpha)
+        self.assertAlmostEqual(self.agent.q_table[2, 1], self.agent.alpha)
+        self.assertLess(self.agent.epsilon, 1.0)
+
+    def test_sum_tree(self):
+        """Test that the sum tree tracks totals and samples leaves proportionally to priority."""
+        tree = SumTree(5)
+        tree.update([0, 1, 2, 3, 4], [1.0, 2.0, 3.0, 4.0, 0.0])
+        self.assertAlmostEqual(tree.total(), 10.0)
+        self.assertTrue(np.array_equal(tree.find([0.5, 1.5, 3.5, 9.9]), [0, 1, 2, 3]))
+        tree.update([3], [0.0])
+        self.assertAlmostEqual(tree.total(), 6.0)
+        # Rounding past the total must not land on the empty leaves behind the last priority
+        self.assertTrue(np.array_equal(tree.find([6.0, 6.0 * (1 + 1e-12)]), [2, 2]))
+
+    def test_prioritized_replay(self):
+        """Test that prioritized replay returns importance weights and updates priorities from TD errors."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=self.num_qubits, action_space=self.action_space,
+                                                  memory_size=10, prioritized_replay=True)
+        for action in range(8):
+            agent.remember(np.array([0, 1, 0]), action % self.action_space, float(action), np.array([1, 0, 1]), False)
+        indices, _, weights = agent.memory.sample(4, agent.rng)
+        self.assertEqual(len(indices), 4)
+        self.assertLessEqual(weights.max(), 1.0)
+        td_errors = agent.replay(4)
+        self.assertEqual(len(td_errors), 4)
+        self.assertGreater(agent.memory.max_priority, 1.0)
+        self.assertNotAlmostEqual(agent.memory.tree.total(), 8.0)
+
+    def test_prioritized_sampling_skips_empty_slots(self):
+        """Test that a partially filled memory only samples stored transitions with finite weights."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=self.num_qubits, action_space=self.action_space,
+                                                  memory_size=13, prioritized_replay=True)
+        for action in range(3):
+            agent.remember(np.array([0, 1, 0]), action % self.action_space, float(action), np.array([1, 0, 1]), False)
+        agent.memory.tree.update([0, 1, 2], [0.1, 0.2, 0.3])
+        for _ in range(200):
+            indices, _, weights = agent.memory.sample(8, agent.rng)
+            self.assertTrue(np.all(indices < 3))
+            self.assertTrue(np.all(np.isfinite(weights)))
+
+    def test_act_batch(self):
+        """Test vectorized epsilon-greedy action selection for a matrix of states."""
+        self.agent.epsilon = 0.0
+        self.agent.q_table[3, 2] = 10
+        self.agent.q_table[5, 1] = 10
+        actions = self.agent.act_batch(np.array([[0, 1, 1], [1, 0, 1], [0, 1, 1]]))
+        self.assertTrue(np.array_equal(actions, [2, 1, 2]))
+        self.agent.epsilon = 1.0
+        actions = self.agent.act_batch(np.zeros((50, self.num_qubits), dtype=int))
+        self.assertTrue(np.all((actions >= 0) & (actions < self.action_space)))
+
+    def test_train_vectorized(self):
+        """Test lockstep training over environments stepped in worker processes and in-process."""
+        for use_processes in (False, True):
+            runner = VectorizedEnvironmentRunner([BitFlipEnvironment] * 3, use_processes=use_processes)
+            try:
+                summary = self.agent.train_vectorized(runner, 20, replay_batch_size=8)
+            finally:
+                runner.close()
+            self.assertEqual(summary['steps'], 60)
+            self.assertEqual(len(self.agent.memory), 60 * (1 + use_processes))
+            self.assertEqual(runner.states.shape, (3, self.num_qubits))
+
+    def test_sparse_q_table(self):
+        """Test that the sparse Q-table behaves like a dense one while storing only written states."""
+        table = SparseQTable(2 ** 40, self.action_space, initial_capacity=4)
+        dense = {}
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            states = rng.integers(0, 2 ** 40, 32)
+            actions = rng.integers(0, self.action_space, 32)
+            table.add_at(states, actions, np.ones(32))
+            for state, action in zip(states, actions):
+                dense.setdefault(state, np.zeros(self.action_space))[action] += 1
+        keys = np.array(list(dense))
+        self.assertEqual(table.size, len(dense))
+        self.assertTrue(np.array_equal(table[keys], np.array([dense[key] for key in keys])))
+        self.assertTrue(np.all(table[12345] == 0))
+        table[7, 1] = 3.0
+        self.assertEqual(table[7, 1], 3.0)
+        rows = np.arange(4 * 600, dtype=float).reshape(600, 4)
+        table[np.arange(600) + 2 ** 39] = rows
+        self.assertTrue(np.array_equal(table[np.arange(600) + 2 ** 39], rows))
+
+    def test_sparse_agent_save_and_load_model(self):
+        """Test acting, learning and persistence with the sparse Q-table backend."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=40, action_space=self.action_space, q_table_backend='sparse')
+        agent.epsilon = 0.0
+        state = np.zeros(40, dtype=int)
+        state[-2:] = 1
+        agent.q_table[3, 2] = 10
+        self.assertEqual(agent.act(state), 2)
+        agent.learn(state, 1, 1.0, state, False)
+        path = "test_sparse_q_table.npy"
+        agent.save_model(path)
+        loaded_agent = QuantumReinforcementLearningAgent(num_qubits=40, action_space=self.action_space,
+                                                         q_table_backend='sparse')
+        loaded_agent.load_model(path)
+        self.assertEqual(loaded_agent.q_table[3, 2], 10)
+        self.assertEqual(loaded_agent.q_table.size, 1)
+        os.remove(path)
+
+    def test_incremental_checkpoint(self):
+        """Test that incremental checkpoints write dirty rows and restore metadata with a memory-mapped table."""
+        directory = 'test_checkpoint'
+        states = np.array([[0, 0, 1], [1, 1, 0]])
+        self.agent.learn_batch(states, [1, 2], [1.0, 2.0], states, [False, True])
+        self.agent.save_checkpoint(directory)
+        self.assertEqual(len(self.agent.dirty_states()), 0)
+        self.agent.learn(np.array([1, 1, 1]), 3, 5.0, np.array([0, 0, 0]), True)
+        self.assertTrue(np.array_equal(self.agent.dirty_states(), [7]))
+        self.agent.save_checkpoint(directory, incremental=True)
+
+        loaded_agent = QuantumReinforcementLearningAgent(num_qubits=self.num_qubits, action_space=self.action_space)
+        metadata = loaded_agent.load_checkpoint(directory)
+        self.assertIsInstance(loaded_agent.q_table, np.memmap)
+        self.assertTrue(np.array_equal(loaded_agent.q_table, self.agent.q_table))
+        self.assertEqual(loaded_agent.epsilon, self.agent.epsilon)
+        self.assertEqual(metadata['step_count'], 3)
+        shutil.rmtree(directory)
+
+    def test_dirty_tracking_cost_stays_flat(self):
+        """Test that dirty rows are tracked in a fixed bitmap that learning updates in place."""
+        agent = QuantumReinforcementLearningAgent(num_qubits=21, action_space=2)
+        agent._mark_dirty(np.arange(1 << 21))
+        dirty_rows = agent._dirty_rows
+        self.assertEqual(dirty_rows.dtype, np.bool_)
+        self.assertEqual(dirty_rows.shape, (1 << 21,))
+        state = np.zeros(21, dtype=int)
+        for _ in range(20):
+            agent.learn(state, 1, 1.0, state, False)
+        self.assertIs(agent._dirty_rows, dirty_rows, "Learning should not rebuild the dirty bitmap")
+        self.assertEqual(len(agent.dirty_states()), 1 << 21)
+
+    def test_sparse_dirty_flags_survive_growth(self):
+        """Test that sparse tables keep their written-state flags when they grow."""
+        table = SparseQTable(2 ** 40, self.action_space, initial_capacity=4)
+        table[[5, 9]] = 1.0
+        table.clear_dirty()
+        table.add_at(np.arange(100, 200), np.zeros(100, dtype=int), np.ones(100))
+        self.assertTrue(np.array_equal(table.dirty_states(), np.arange(100, 200)))
+
+    def test_sparse_incremental_checkpoint(self):
+        """Test that sparse checkpoints replay their delta files on load."""
+        directory = 'test_sparse_checkpoint'
+        agent = QuantumReinforcementLearningAgent(num_qubits=30, action_space=self.action_space, q_table_backend='sparse')
+        state = np.zeros(30, dtype=int)
+        agent.learn(state, 1, 1.0, state, False)
+        agent.save_checkpoint(directory)
+        state[0] = 1
+        agent.learn(state, 2, 1.0, state, False)
+        agent.save_checkpoint(directory, incremental=True)
+        self.assertTrue(os.path.exists(os.path.join(directory, 'delta_000000.npz')))
+
+        loaded_agent = QuantumReinforcementLearningAgent(num_qubits=30, action_space=self.action_space,
+                                                         q_table_backend='sparse')
+        loaded_agent.load_checkpoint(directory)
+        self.assertEqual(loaded_agent.q_table.size, 2)
+        self.assertEqual(loaded_agent.q_table[2 ** 29, 2], agent.q_table[2 ** 29, 2])
+        shutil.rmtree(directory)
+
     def test_save_and_load_model(self):
         """Test saving and loading the Q-table."""
         path = "test_q_table.npy"
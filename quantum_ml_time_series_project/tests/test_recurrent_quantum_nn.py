@@ -1,7 +1,7 @@
 
 import unittest
 import numpy as np
-from src.recurrent_quantum_nn import RecurrentQuantumNN
+from src.recurrent_quantum_nn import RecurrentQuantumNN, CachedQuantumKernel
 
 class TestRecurrentQuantumNN(unittest.TestCase):
     def setUp(self):
@@ -15,6 +15,7 @@ class TestRecurrentQuantumNN(unittest.TestCase):
         data = np.random.rand(100, self.time_steps)
         model = self.rqnn.build_model(data)
         self.assertIsNotNone(model)
+        self.assertEqual(model.optimizer.settings['lr'], self.rqnn.learning_rate)
 
     def test_predict(self):
         """Test if the model predicts output for given time series data."""
@@ -23,6 +24,24 @@ class TestRecurrentQuantumNN(unittest.TestCase):
         predictions = self.rqnn.predict(model, data)
         self.assertEqual(len(predictions), len(data) - self.time_steps)
 
+    def test_streaming_predictions(self):
+        """Test that streaming predictions match predictions over the full series."""
+        data = np.random.rand(40, self.time_steps)
+        model = self.rqnn.build_model(data)
+        expected = np.asarray(self.rqnn.predict(model, data))
+        stream = self.rqnn.create_stream(model, history=data[:10])
+        predictions = [stream.update(sample) for sample in data[10:-1]]
+        self.assertTrue(np.allclose(np.asarray(predictions).reshape(expected[8:].shape), expected[8:]))
+
+    def test_forecast(self):
+        """Test that single-series and batched multi-step forecasts agree."""
+        data = np.random.rand(40, self.time_steps)
+        model = self.rqnn.build_model(data)
+        forecast = self.rqnn.forecast(model, data, horizon=4)
+        batch = self.rqnn.forecast_batch(model, np.stack([data[-self.time_steps:]] * 2), horizon=4)
+        self.assertEqual(forecast.shape, (4, self.time_steps))
+        self.assertTrue(np.allclose(batch[1], forecast))
+
     def test_evaluate(self):
         """Test if the model evaluates and returns a valid score (e.g., MSE)."""
         data = np.random.rand(100, self.time_steps)
@@ -38,6 +57,69 @@ class TestRecurrentQuantumNN(unittest.TestCase):
         self.assertIsNotNone(best_params)
         self.assertIsInstance(best_score, float)
 
+    def test_successive_halving_search(self):
+        """Test that successive halving returns a grid configuration and caches validation scores."""
+        data = np.random.rand(100, self.time_steps)
+        param_grid = {'learning_rate': [0.01, 0.05], 'time_steps': [2, 3]}
+        best_params, best_score = self.rqnn.optimize_hyperparameters(data, param_grid, successive_halving=True)
+        self.assertIn(best_params['time_steps'], [2, 3])
+        self.assertIsInstance(best_score, float)
+        num_cached = len(self.rqnn._score_cache)
+        self.rqnn.optimize_hyperparameters(data, param_grid, successive_halving=True)
+        self.assertEqual(len(self.rqnn._score_cache), num_cached, "Repeated searches should reuse cached scores")
+
+    def test_cached_quantum_kernel(self):
+        """Test that blockwise parallel Gram matrices match serial ones and reuse cached encodings."""
+        windows = np.random.rand(20, self.time_steps)
+        kernel = CachedQuantumKernel(block_size=6, n_jobs=2)
+        gram = kernel.evaluate(windows)
+        self.assertEqual(kernel.stats()['misses'], 20)
+        self.assertTrue(np.allclose(gram, gram.T))
+        self.assertTrue(np.allclose(np.diag(gram), 1.0))
+        cross = kernel.evaluate(windows[:5], windows)
+        self.assertTrue(np.allclose(cross, gram[:5]))
+        self.assertEqual(kernel.stats()['misses'], 20, "Known windows should not be re-encoded")
+
+    def test_kernel_encoding_cache_is_bounded_by_bytes(self):
+        """Test that the encoding cache evicts the oldest statevectors once it exceeds its byte budget."""
+        state_bytes = 16 * 2 ** self.time_steps
+        kernel = CachedQuantumKernel(max_encoding_bytes=5 * state_bytes)
+        windows = np.random.rand(8, self.time_steps)
+        kernel.encode(windows)
+        self.assertEqual(kernel.stats()['encodings'], 5)
+        self.assertEqual(kernel.stats()['encoding_bytes'], 5 * state_bytes)
+        kernel.encode(windows[-5:])
+        self.assertEqual(kernel.stats()['misses'], 8, "The most recent windows should still be cached")
+
+    def test_kernel_model(self):
+        """Test that a kernel-backed network fits, evaluates and shares its kernel cache."""
+        kernel = CachedQuantumKernel()
+        rqnn = RecurrentQuantumNN(num_qubits=self.num_qubits, time_steps=self.time_steps, kernel=kernel)
+        data = np.random.rand(60)
+        model = rqnn.build_model(data)
+        misses = kernel.stats()['misses']
+        self.assertGreaterEqual(rqnn.evaluate(model, data), 0)
+        self.assertEqual(kernel.stats()['misses'], misses)
+
+    def test_kernel_shared_across_time_steps_search(self):
+        """Test that one kernel serves a hyperparameter search over different look-back lengths."""
+        kernel = CachedQuantumKernel()
+        rqnn = RecurrentQuantumNN(num_qubits=self.num_qubits, time_steps=self.time_steps, kernel=kernel)
+        data = np.sin(np.linspace(0, 10, 80))
+        best_params, best_score = rqnn.optimize_hyperparameters(data, {'time_steps': [2, 3]})
+        self.assertIn(best_params['time_steps'], [2, 3])
+        self.assertIsInstance(best_score, float)
+        self.assertEqual(sorted(kernel.feature_maps), [2, 3])
+
+    def test_search_rejects_unused_hyperparameters(self):
+        """Test that grid keys the model ignores are rejected instead of silently searched."""
+        rqnn = RecurrentQuantumNN(num_qubits=self.num_qubits, time_steps=self.time_steps, kernel=CachedQuantumKernel())
+        data = np.sin(np.linspace(0, 10, 40))
+        with self.assertRaises(ValueError):
+            rqnn.optimize_hyperparameters(data, {'learning_rate': [0.01, 0.05]})
+        with self.assertRaises(ValueError):
+            self.rqnn.optimize_hyperparameters(data, {'kernel_alpha': [1e-3, 1e-2]})
+
     def test_save_and_load_model(self):
         """Test saving and loading the trained quantum recurrent model."""
         data = np.random.rand(100, self.time_steps)
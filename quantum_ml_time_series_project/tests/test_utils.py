@@ -2,7 +2,8 @@
 import unittest
 import numpy as np
 import os
-from src.utils import QuantumUtils
+import shutil
+from src.utils import QuantumUtils, FeatureStore
 
 class TestQuantumUtils(unittest.TestCase):
     def test_normalize_data(self):
@@ -33,12 +34,54 @@ class TestQuantumUtils(unittest.TestCase):
         self.assertTrue(np.array_equal(data, loaded_data))
         os.remove(path)
 
+    def test_feature_store_append_and_partial_read(self):
+        """Test appending to a chunked store and reading row ranges and column subsets."""
+        data = np.random.rand(250, 4)
+        path = 'test_feature_store'
+        QuantumUtils.save_numpy_array(data[:100], path, chunk_rows=64)
+        QuantumUtils.save_numpy_array(data[100:], path, append=True)
+        self.assertEqual(FeatureStore(path).shape, (250, 4))
+        self.assertEqual(FeatureStore(path).chunk_lengths, [64, 64, 64, 58])
+        self.assertTrue(np.array_equal(QuantumUtils.load_numpy_array(path), data))
+        partial = QuantumUtils.load_numpy_array(path, start=60, stop=130, columns=[0, 2])
+        self.assertTrue(np.array_equal(partial, data[60:130][:, [0, 2]]))
+        shutil.rmtree(path)
+
+    def test_append_to_plain_npy_file(self):
+        """Test that appending to an array saved with np.save converts it into a feature store."""
+        data = np.random.rand(150, 3)
+        path = 'test_plain_append.npy'
+        QuantumUtils.save_numpy_array(data[:100], path)
+        QuantumUtils.save_numpy_array(data[100:], path, append=True)
+        self.assertTrue(os.path.isdir(path))
+        self.assertTrue(np.array_equal(QuantumUtils.load_numpy_array(path), data))
+        shutil.rmtree(path)
+
     def test_calculate_moving_average(self):
         """Test calculating the moving average of a dataset."""
         data = np.array([1, 2, 3, 4, 5])
         moving_average = QuantumUtils.calculate_moving_average(data, window_size=3)
         self.assertEqual(len(moving_average), 3)
 
+    def test_sliding_windows(self):
+        """Test that sliding windows are zero-copy views matching explicit slices."""
+        data = np.random.rand(20, 3)
+        windows = QuantumUtils.sliding_windows(data, 4, num_windows=len(data) - 4)
+        expected = np.array([data[i:i + 4] for i in range(len(data) - 4)])
+        self.assertEqual(windows.shape, (16, 4, 3))
+        self.assertTrue(np.array_equal(windows, expected))
+        self.assertTrue(np.shares_memory(windows, data))
+        copied = QuantumUtils.sliding_windows(data, 4, copy=True)
+        self.assertFalse(np.shares_memory(copied, data))
+        self.assertEqual(len(copied), 17)
+
+    def test_array_fingerprint(self):
+        """Test that array fingerprints depend on contents, shape and dtype."""
+        data = np.arange(12, dtype=np.float64)
+        self.assertEqual(QuantumUtils.array_fingerprint(data), QuantumUtils.array_fingerprint(data.copy()))
+        self.assertNotEqual(QuantumUtils.array_fingerprint(data), QuantumUtils.array_fingerprint(data.reshape(3, 4)))
+        self.assertNotEqual(QuantumUtils.array_fingerprint(data), QuantumUtils.array_fingerprint(data.astype(np.float32)))
+
     def test_split_time_series(self):
         """Test splitting a time series into training and testing datasets."""
         data = np.random.rand(100)
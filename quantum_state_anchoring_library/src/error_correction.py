@@ -1,18 +1,17 @@
 
 import numpy as np
-from qiskit import QuantumCircuit, Aer, execute
+from qiskit import QuantumCircuit
 from qiskit.quantum_info import Statevector
+from .statevector_backend import StatevectorBackend, NumpyStatevectorBackend
 
 class QuantumErrorCorrection:
-    def __init__(self):
+    def __init__(self, backend: StatevectorBackend = None):
         self.corrected_states = {}
+        self.backend = backend if backend else NumpyStatevectorBackend()
 
     def apply_error_correction(self, quantum_circuit: QuantumCircuit):
         """Apply error correction codes to a quantum circuit and return the corrected state"""
-        backend = Aer.get_backend('statevector_simulator')
-        job = execute(quantum_circuit, backend)
-        result = job.result()
-        statevector = Statevector(result.get_statevector(quantum_circuit))
+        statevector = self.backend.run(quantum_circuit)
 
         # Apply simple error correction (parity check or other code)
         corrected_state = self.correct_state(statevector)
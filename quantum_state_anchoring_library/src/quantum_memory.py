@@ -1,19 +1,16 @@
 
-from qiskit import QuantumCircuit, Aer, execute
-from qiskit.quantum_info import Statevector
+from qiskit import QuantumCircuit
+from .statevector_backend import StatevectorBackend, NumpyStatevectorBackend
 
 class QuantumMemory:
-    def __init__(self, memory_size: int = 1):
+    def __init__(self, memory_size: int = 1, backend: StatevectorBackend = None):
         self.memory_size = memory_size
         self.memory_storage = {}
+        self.backend = backend if backend else NumpyStatevectorBackend()
 
     def store_state(self, key: str, quantum_circuit: QuantumCircuit):
         """Store a quantum state in memory after executing the quantum circuit"""
-        backend = Aer.get_backend('statevector_simulator')
-        job = execute(quantum_circuit, backend)
-        result = job.result()
-        statevector = Statevector(result.get_statevector(quantum_circuit))
-        self.memory_storage[key] = statevector
+        self.memory_storage[key] = self.backend.run(quantum_circuit)
 
     def retrieve_state(self, key: str):
         """Retrieve a stored quantum state from memory"""
@@ -1,21 +1,20 @@
 
 import numpy as np
 from datetime import datetime, timedelta
-from qiskit import QuantumCircuit, execute, Aer
+from qiskit import QuantumCircuit
 from qiskit.quantum_info import Statevector
+from .statevector_backend import StatevectorBackend, NumpyStatevectorBackend
 
 class QuantumStateAnchor:
-    def __init__(self, quantum_circuit: QuantumCircuit, anchor_time: datetime = None):
+    def __init__(self, quantum_circuit: QuantumCircuit, anchor_time: datetime = None, backend: StatevectorBackend = None):
         self.quantum_circuit = quantum_circuit
         self.anchor_time = anchor_time if anchor_time else datetime.utcnow()
         self.statevector = None
+        self.backend = backend if backend else NumpyStatevectorBackend()
 
     def initialize_state(self):
         """Initialize the quantum state for anchoring"""
-        backend = Aer.get_backend('statevector_simulator')
-        job = execute(self.quantum_circuit, backend)
-        result = job.result()
-        self.statevector = Statevector(result.get_statevector(self.quantum_circuit))
+        self.statevector = self.backend.run(self.quantum_circuit)
 
     def anchor_state(self, anchor_time: datetime = None):
         """Anchor the quantum state at a given time"""
@@ -0,0 +1,134 @@
+
+from abc import ABC, abstractmethod
+import numpy as np
+from qiskit import QuantumCircuit, Aer, execute
+from qiskit.quantum_info import Statevector
+
+# Directives that do not act on the statevector
+_IGNORED_OPERATIONS = {'barrier', 'delay', 'id'}
+
+class StatevectorBackend(ABC):
+    """Interface shared by the statevector simulators used across the library"""
+
+    @abstractmethod
+    def run(self, quantum_circuit: QuantumCircuit):
+        """Simulate a quantum circuit and return its final Statevector"""
+
+    def run_batch(self, quantum_circuits):
+        """Simulate several quantum circuits and return their Statevectors in order"""
+        return [self.run(quantum_circuit) for quantum_circuit in quantum_circuits]
+
+class NumpyStatevectorBackend(StatevectorBackend):
+    """In-process statevector engine applying gates as tensor contractions on a NumPy array
+
+    Composite instructions (circuit-library blocks, appended sub-circuits, initialize) are simulated through
+    their definitions and final measurements are dropped. Circuits that remain non-unitary, e.g. with
+    mid-circuit measurements, run on Aer when fallback is enabled and raise ValueError otherwise.
+    """
+
+    def __init__(self, dtype=np.complex128, fallback: bool = True):
+        self.dtype = dtype
+        self.fallback = fallback
+        self._fallback_backend = None
+        self._gate_cache = {}
+
+    def run(self, quantum_circuit: QuantumCircuit):
+        """Simulate a quantum circuit starting from the all-zero state"""
+        quantum_circuit = quantum_circuit.remove_final_measurements(inplace=False)
+        num_qubits = quantum_circuit.num_qubits
+        state = np.zeros(2 ** num_qubits, dtype=self.dtype)
+        state[0] = 1
+        try:
+            state = self.evolve(state.reshape((2,) * num_qubits), quantum_circuit)
+        except ValueError:
+            if not self.fallback:
+                raise
+            if self._fallback_backend is None:
+                self._fallback_backend = AerStatevectorBackend()
+            return self._fallback_backend.run(quantum_circuit)
+        phase = np.exp(1j * float(quantum_circuit.global_phase))
+        return Statevector(phase * state.reshape(-1))
+
+    def evolve(self, state: np.ndarray, quantum_circuit: QuantumCircuit, qubit_map=None):
+        """Apply every gate of a circuit to a state tensor of shape (2,) * num_qubits
+
+        qubit_map gives the state axes of the circuit's qubits when evolving the definition of a sub-instruction.
+        """
+        num_qubits = state.ndim
+        for instruction in quantum_circuit.data:
+            operation = instruction.operation
+            if operation.name in _IGNORED_OPERATIONS:
+                continue
+            qubits = [quantum_circuit.find_bit(qubit).index for qubit in instruction.qubits]
+            if qubit_map is not None:
+                qubits = [qubit_map[qubit] for qubit in qubits]
+            if getattr(operation, 'condition', None) is not None:
+                raise ValueError(f"Classically conditioned operation '{operation.name}' cannot be simulated as a unitary gate")
+            if operation.name == 'reset':
+                state = self._reset(state, qubits[0], num_qubits)
+                continue
+            matrix = self._gate_matrix(operation)
+            if matrix is not None:
+                state = self.apply_matrix(state, matrix, qubits, num_qubits)
+            elif operation.definition is not None and not instruction.clbits:
+                definition = operation.definition
+                state = self.evolve(state, definition, qubit_map=qubits)
+                state = state * np.exp(1j * float(definition.global_phase))
+            else:
+                raise ValueError(f"Operation '{operation.name}' cannot be simulated as a unitary gate")
+        return state
+
+    @staticmethod
+    def _reset(state: np.ndarray, qubit: int, num_qubits: int):
+        """Reset a qubit that is already in |0>; resetting an excited qubit is not a unitary operation"""
+        excited = np.take(state, 1, axis=num_qubits - 1 - qubit)
+        if not np.allclose(excited, 0):
+            raise ValueError("Reset of a qubit that is not in |0> cannot be simulated as a unitary gate")
+        return state
+
+    @staticmethod
+    def apply_matrix(state: np.ndarray, matrix: np.ndarray, qubits, num_qubits: int):
+        """Contract a k-qubit gate matrix into the given qubit axes of the state tensor"""
+        num_targets = len(qubits)
+        # Qiskit orders the gate matrix and the statevector little-endian, while the
+        # tensor axes run from the most significant qubit to the least significant one
+        axes = [num_qubits - 1 - qubit for qubit in reversed(qubits)]
+        gate = matrix.reshape((2,) * (2 * num_targets))
+        state = np.tensordot(gate, state, axes=(list(range(num_targets, 2 * num_targets)), axes))
+        return np.moveaxis(state, list(range(num_targets)), axes)
+
+    def _gate_matrix(self, operation):
+        """Return the unitary of an operation, reusing matrices of identical gates, or None if it has no matrix"""
+        try:
+            key = (operation.name, operation.num_qubits, tuple(float(p) for p in operation.params))
+        except TypeError:
+            key = None
+        if key is not None and key in self._gate_cache:
+            return self._gate_cache[key]
+        try:
+            matrix = np.asarray(operation.to_matrix(), dtype=self.dtype)
+        except Exception:
+            return None  # No direct matrix; the caller decomposes the operation instead
+        if key is not None:
+            self._gate_cache[key] = matrix
+        return matrix
+
+    def clear_cache(self):
+        """Clear the cached gate matrices"""
+        self._gate_cache.clear()
+
+class AerStatevectorBackend(StatevectorBackend):
+    """Statevector backend delegating to the Aer statevector_simulator"""
+
+    def __init__(self):
+        self.backend = Aer.get_backend('statevector_simulator')
+
+    def run(self, quantum_circuit: QuantumCircuit):
+        """Execute a quantum circuit on Aer and return its final Statevector"""
+        return self.run_batch([quantum_circuit])[0]
+
+    def run_batch(self, quantum_circuits):
+        """Execute several quantum circuits in a single Aer job"""
+        job = execute(quantum_circuits, self.backend)
+        result = job.result()
+        return [Statevector(result.get_statevector(quantum_circuit)) for quantum_circuit in quantum_circuits]
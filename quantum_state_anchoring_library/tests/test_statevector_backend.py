@@ -0,0 +1,77 @@
+
+import unittest
+import numpy as np
+from qiskit import QuantumCircuit
+from qiskit.circuit.library import QFT, EfficientSU2
+from qiskit.quantum_info import Statevector
+from quantum_state_anchoring.src.statevector_backend import StatevectorBackend, NumpyStatevectorBackend, AerStatevectorBackend
+
+class TestStatevectorBackend(unittest.TestCase):
+    def setUp(self):
+        """Set up a multi-qubit circuit and both statevector backends"""
+        self.qc = QuantumCircuit(3)
+        self.qc.h(0)
+        self.qc.cx(0, 2)
+        self.qc.rx(0.3, 1)
+        self.qc.cry(0.7, 1, 0)
+        self.qc.swap(1, 2)
+        self.qc.t(2)
+        self.numpy_backend = NumpyStatevectorBackend()
+        self.aer_backend = AerStatevectorBackend()
+
+    def test_matches_aer_statevector(self):
+        """Test that the NumPy engine reproduces the Aer statevector"""
+        numpy_state = self.numpy_backend.run(self.qc)
+        aer_state = self.aer_backend.run(self.qc)
+        self.assertTrue(np.allclose(numpy_state.data, aer_state.data), "Statevectors should match Aer")
+
+    def test_qubit_ordering(self):
+        """Test that the NumPy engine follows Qiskit's little-endian qubit ordering"""
+        qc = QuantumCircuit(3)
+        qc.x(0)
+        state = self.numpy_backend.run(qc)
+        self.assertAlmostEqual(abs(state.data[1]), 1.0, msg="Qubit 0 should be the least significant bit")
+
+    def test_run_batch(self):
+        """Test that a batch of circuits returns one statevector per circuit"""
+        states = self.numpy_backend.run_batch([self.qc, self.qc])
+        self.assertEqual(len(states), 2)
+        self.assertTrue(np.allclose(states[0].data, states[1].data), "Identical circuits should give identical states")
+
+    def test_circuit_library_circuits(self):
+        """Test that composite circuit-library blocks, sub-circuits and initialize run on the default backend"""
+        ansatz = EfficientSU2(3)
+        sub = QuantumCircuit(2, global_phase=0.4)
+        sub.h(0)
+        sub.cx(0, 1)
+        composed = QuantumCircuit(3)
+        composed.initialize([0, 0.6, 0, 0, 0, 0, 0.8, 0])
+        composed.append(sub.to_gate(), [2, 0])
+        for qc in (QFT(3), ansatz.assign_parameters(np.linspace(0, 1, ansatz.num_parameters)), composed):
+            state = self.numpy_backend.run(qc)
+            self.assertTrue(np.allclose(state.data, Statevector(qc).data), "Statevectors should match Qiskit")
+
+    def test_final_measurements_are_removed(self):
+        """Test that final measurements are dropped before simulation"""
+        qc = QFT(3).copy()
+        qc.measure_all()
+        state = self.numpy_backend.run(qc)
+        self.assertTrue(np.allclose(state.data, Statevector(QFT(3)).data))
+
+    def test_non_unitary_operation(self):
+        """Test that mid-circuit measurements are rejected by the NumPy engine without fallback"""
+        qc = QuantumCircuit(1, 1)
+        qc.h(0)
+        qc.measure(0, 0)
+        qc.h(0)
+        with self.assertRaises(ValueError):
+            NumpyStatevectorBackend(fallback=False).run(qc)
+        self.assertEqual(self.numpy_backend.run(qc).dim, 2, "The default backend should fall back to Aer")
+
+    def test_backend_interface_is_abstract(self):
+        """Test that the backend interface cannot be instantiated without run"""
+        with self.assertRaises(TypeError):
+            StatevectorBackend()
+
+if __name__ == '__main__':
+    unittest.main()